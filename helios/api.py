@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 from typing import List, Optional, Dict, Any
 
 from fastapi import (
@@ -10,19 +11,28 @@ from fastapi import (
     HTTPException,
 )
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from src.pipeline import load_or_build_graph
+from src.pipeline import load_or_build_graph, update_graph, GRAPH_STORE_DIR
 from src.policy_summary import summarize_policy
+from src.graph_snapshot import current_snapshot, publish_graph, rebuild_graph, watch_store
 from src.risk_engine import (
     policy_precheck,
+    precheck_memo_stats,
     analyze_business_risk,
 )
 from src.coverage_matcher import (
     compare_policy_with_needs,
+    coverage_matrix,
     explain_policy_vs_risks,
+    stream_policy_vs_risks,
 )
 from src.ai_client import chat
+from src.llm_cache import cache_stats
+from src.jobs import register_handler, submit_job, get_job, resume_jobs
+from src.fanout import fan_out_iter
 
 # ---------------------------------------------------
 # APP INIT
@@ -44,7 +54,10 @@ app.add_middleware(
 UPLOAD_DIR = "pdfs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-G = load_or_build_graph()
+# Requests read the current snapshot; rebuilds publish a new one, and
+# versions saved by other workers are picked up from the store
+publish_graph(load_or_build_graph())
+watch_store(GRAPH_STORE_DIR)
 
 # ---------------------------------------------------
 # MODELS
@@ -59,10 +72,16 @@ class CompareRequest(BaseModel):
     policy_name: str
 
 
+class CoverageMatrixRequest(BaseModel):
+    text: str
+    top_k: int = 3
+    explain: bool = False
+
+
 class PolicyCard(BaseModel):
     file_name: str
     summary: str
-    recommendation: str
+    recommendation: Optional[str] = None
 
 
 class BusinessRiskResponse(BaseModel):
@@ -124,6 +143,22 @@ def format_policy_summary(raw_summary: Dict) -> str:
     return "\n\n".join(sections) if sections else "No structured summary available."
 
 
+# Constant instructions first, so the local backend can reuse their KV cache
+RECOMMENDATION_PREFIX = """
+You are a senior commercial insurance advisor.
+
+Evaluate whether the insurance policy below is useful for the business.
+
+Instructions:
+- Start with: Assessment: <Highly relevant | Partially relevant | Not relevant>
+- Explain WHY in simple business language
+- Mention key gaps or mismatches
+- End with a clear action (keep / upgrade / supplement / replace)
+- Max 6 short sentences
+- Do NOT restate the policy summary
+"""
+
+
 def generate_recommendation(
     policy_name: str,
     policy_summary: str,
@@ -140,48 +175,33 @@ Business context:
 - Description: {business_info.get("description")}
 """
 
-    prompt = f"""
-You are a senior commercial insurance advisor.
-
-Evaluate whether the following insurance policy is useful for the business.
-
+    prompt = RECOMMENDATION_PREFIX + f"""
 {business_context}
 
 Policy summary:
 \"\"\"
 {policy_summary}
 \"\"\"
-
-Instructions:
-- Start with: Assessment: <Highly relevant | Partially relevant | Not relevant>
-- Explain WHY in simple business language
-- Mention key gaps or mismatches
-- End with a clear action (keep / upgrade / supplement / replace)
-- Max 6 short sentences
-- Do NOT restate the policy summary
 """
 
+    # Greedy, so repeat dashboard loads are served from the LLM cache
     return chat(
         [{"role": "user", "content": prompt}],
-        temperature=0.4,
+        temperature=0.0,
         max_new_tokens=250,
+        prefix=RECOMMENDATION_PREFIX,
     ).strip()
 
 
-def build_policy_cards(business_info: Optional[dict] = None) -> List[PolicyCard]:
-    cards: List[PolicyCard] = []
-
-    policies = sorted(
-        set(
-            data.get("source")
-            for _, _, data in G.edges(data=True)
-            if data.get("source")
-        )
-    )
+def build_policy_summaries(snapshot) -> list[tuple[str, str]]:
+    """
+    (policy, summary text) for every policy, straight from the graph index.
+    """
+    summaries = []
 
-    for policy in policies:
+    for policy in snapshot.index.sources:
         try:
-            raw_summary = summarize_policy(policy, G)
+            raw_summary = summarize_policy(policy, snapshot.graph)
             summary_text = (
                 format_policy_summary(raw_summary)
                 if isinstance(raw_summary, dict)
@@ -190,24 +210,70 @@ def build_policy_cards(business_info: Optional[dict] = None) -> List[PolicyCard]
         except Exception:
             summary_text = "Summary unavailable for this policy."
 
-        try:
-            recommendation_text = generate_recommendation(
-                policy_name=policy,
-                policy_summary=summary_text,
-                business_info=business_info,
-            )
-        except Exception:
-            recommendation_text = "Recommendation unavailable."
+        summaries.append((policy, summary_text))
 
-        cards.append(
-            PolicyCard(
-                file_name=policy,
-                summary=summary_text[:1000],
-                recommendation=recommendation_text[:500],
-            )
+    return summaries
+
+
+def _recommend(business_info: Optional[dict]):
+    return lambda args: generate_recommendation(
+        policy_name=args[0],
+        policy_summary=args[1],
+        business_info=business_info,
+    )
+
+
+def build_policy_cards(
+    snapshot,
+    business_info: Optional[dict] = None,
+    progress=None,
+) -> List[PolicyCard]:
+    summaries = build_policy_summaries(snapshot)
+    recommendations = [None] * len(summaries)
+
+    if progress:
+        progress(total=len(summaries))
+
+    # Recommendations are independent LLM calls: run them concurrently and
+    # keep whatever completes; failed or timed-out ones get a placeholder.
+    for i, recommendation, _ in fan_out_iter(_recommend(business_info), summaries):
+        recommendations[i] = recommendation
+        if progress:
+            progress(done=1)
+
+    return [
+        PolicyCard(
+            file_name=policy,
+            summary=summary_text[:1000],
+            recommendation=(recommendation or "Recommendation unavailable.")[:500],
         )
+        for (policy, summary_text), recommendation in zip(summaries, recommendations)
+    ]
 
-    return cards
+
+def stream_policy_cards(snapshot, business_info: Optional[dict] = None):
+    """
+    NDJSON lines: every card first with recommendation null, then one
+    {"file_name", "recommendation"} line per recommendation as it completes.
+    """
+    summaries = build_policy_summaries(snapshot)
+
+    yield json.dumps({
+        "type": "cards",
+        "policies": [
+            PolicyCard(file_name=policy, summary=summary_text[:1000]).model_dump()
+            for policy, summary_text in summaries
+        ],
+    }) + "\n"
+
+    for i, recommendation, _ in fan_out_iter(_recommend(business_info), summaries):
+        yield json.dumps({
+            "type": "recommendation",
+            "file_name": summaries[i][0],
+            "recommendation": (recommendation or "Recommendation unavailable.")[:500],
+        }) + "\n"
+
+    yield json.dumps({"type": "done"}) + "\n"
 
 
 # ---------------------------------------------------
@@ -221,8 +287,9 @@ def detect_risk(req: RiskRequest):
 
 @app.post("/compare")
 def compare_policy(req: CompareRequest):
+    snapshot = current_snapshot()
     needs = policy_precheck(req.text)
-    comparison = compare_policy_with_needs(G, req.policy_name, needs)
+    comparison = compare_policy_with_needs(snapshot.graph, req.policy_name, needs)
     explanation = explain_policy_vs_risks(req.policy_name, needs, comparison)
 
     return {
@@ -232,10 +299,67 @@ def compare_policy(req: CompareRequest):
     }
 
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/compare/stream")
+def compare_policy_stream(req: CompareRequest):
+    """
+    Server-sent events: "comparison" (needs + comparison JSON) first, then
+    one "token" event per explanation piece, then "done".
+    """
+    snapshot = current_snapshot()
+    needs = policy_precheck(req.text)
+    comparison = compare_policy_with_needs(snapshot.graph, req.policy_name, needs)
+
+    def events():
+        yield sse_event("comparison", {"needs": needs, "comparison": comparison})
+
+        try:
+            for piece in stream_policy_vs_risks(req.policy_name, needs, comparison):
+                yield sse_event("token", piece)
+        except Exception as e:
+            yield sse_event("error", str(e))
+
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/coverage-matrix")
+def compare_all_policies(req: CoverageMatrixRequest):
+    needs = policy_precheck(req.text)
+
+    return {
+        "risk_profile": needs,
+        **coverage_matrix(
+            current_snapshot().graph, needs, top_k=req.top_k, explain=req.explain
+        ),
+    }
+
+
 @app.get("/policy-dashboard", response_model=PolicyDashboardResponse)
 def policy_dashboard():
     return PolicyDashboardResponse(
-        policies=build_policy_cards()
+        policies=build_policy_cards(current_snapshot())
+    )
+
+
+@app.get("/policy-dashboard/stream")
+def policy_dashboard_stream():
+    """
+    Progressive dashboard: summaries arrive at once, recommendations as
+    they complete (see stream_policy_cards).
+    """
+    return StreamingResponse(
+        stream_policy_cards(current_snapshot()),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -248,22 +372,28 @@ async def analyze_after_upload(
     files: List[UploadFile] = File(...),
     business_info: Optional[str] = Form(None),
 ):
-    global G
-
     for file in files:
         if file.filename.lower().endswith(".pdf"):
             with open(os.path.join(UPLOAD_DIR, file.filename), "wb") as f:
                 f.write(await file.read())
 
-    G = load_or_build_graph()
+    # Rebuilt on a copy; other requests keep serving the old snapshot
+    snapshot = await run_in_threadpool(rebuild_graph, update_graph)
 
     business_data = json.loads(business_info) if business_info else None
-    cards = build_policy_cards(business_data)
 
-    business_risk = None
-    if business_data:
-        risk = analyze_business_risk(business_data)
-        business_risk = BusinessRiskResponse(**risk)
+    # Cards and business risk analysis are independent; run them side by side
+    # off the event loop.
+    async def business_risk_task():
+        if not business_data:
+            return None
+        risk = await run_in_threadpool(analyze_business_risk, business_data)
+        return BusinessRiskResponse(**risk)
+
+    cards, business_risk = await asyncio.gather(
+        run_in_threadpool(build_policy_cards, snapshot, business_data),
+        business_risk_task(),
+    )
 
     return PolicyDashboardResponse(
         policies=cards,
@@ -271,6 +401,76 @@ async def analyze_after_upload(
     )
 
 
+# ---------------------------------------------------
+# BACKGROUND JOBS
+# ---------------------------------------------------
+
+def run_analysis_job(job):
+    """
+    Background version of /analyze-after-upload; the PDFs are already on
+    disk when the job is queued.
+    """
+    business_data = job.params.get("business_data")
+
+    def ingest(progress):
+        snapshot = rebuild_graph(lambda G: update_graph(G, progress=progress))
+        return {"version": snapshot.version, "policies": len(snapshot.index.sources)}
+
+    job.run_stage("ingest", ingest)
+
+    cards = job.run_stage(
+        "cards",
+        lambda progress: [
+            card.model_dump()
+            for card in build_policy_cards(current_snapshot(), business_data, progress)
+        ],
+    )
+
+    business_risk = None
+    if business_data:
+        business_risk = job.run_stage(
+            "business_risk",
+            lambda progress: analyze_business_risk(business_data),
+        )
+
+    return {"policies": cards, "business_risk": business_risk}
+
+
+register_handler("analyze-upload", run_analysis_job)
+
+# Runs in every uvicorn worker; jobs are claimed atomically, so each
+# unfinished job is resumed by exactly one of them
+resume_jobs()
+
+
+@app.post("/jobs/analyze-upload")
+async def analyze_after_upload_job(
+    files: List[UploadFile] = File(...),
+    business_info: Optional[str] = Form(None),
+):
+    """
+    Saves the PDFs, then returns a job id at once; ingest, policy cards and
+    business risk run in the background (poll GET /jobs/{job_id}).
+    """
+    for file in files:
+        if file.filename.lower().endswith(".pdf"):
+            with open(os.path.join(UPLOAD_DIR, file.filename), "wb") as f:
+                f.write(await file.read())
+
+    business_data = json.loads(business_info) if business_info else None
+    job_id = submit_job("analyze-upload", {"business_data": business_data})
+
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 # ---------------------------------------------------
 # BUSINESS ONLY
 # ---------------------------------------------------
@@ -286,3 +486,15 @@ def analyze_business(data: dict):
         "business_profile": data,
         "risk_analysis": analysis,
     }
+
+
+# ---------------------------------------------------
+# DIAGNOSTICS
+# ---------------------------------------------------
+
+@app.get("/llm-cache")
+def llm_cache_stats():
+    return {
+        **cache_stats(),
+        "precheck_memo": precheck_memo_stats(),
+    }
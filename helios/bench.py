@@ -0,0 +1,175 @@
+"""
+Local inference benchmarks (CPU).
+
+    python bench.py prompt-lookup [--runs 3] [--max-new-tokens 200]
+    python bench.py quant [--modes none int8 bf16] [--max-new-tokens 200]
+"""
+import time
+import argparse
+
+import torch
+
+from src.local_llm import (
+    get_local_model,
+    load_local_model,
+    model_memory_bytes,
+    check_risk_json,
+    _chat_single,
+    _render,
+    prompt_lookup_tokens,
+    QUANT_MODES,
+)
+from src.risk_engine import RISK_PROMPT
+from src.policy_summary import build_explain_prompt
+from src.coverage_matcher import build_comparison_prompt
+from src.explainers import build_single_policy_prompt, format_single_policy
+
+
+# ---------------------------------------------------
+# SAMPLE INPUTS FOR THE EXISTING TEMPLATES
+# ---------------------------------------------------
+
+SAMPLE_POLICY = "retail_shop_policy.pdf"
+
+SAMPLE_ROWS = {
+    "Coverages": [
+        ("policy", "COVERS", "fire and allied perils"),
+        ("policy", "COVERS", "burglary and theft of stock"),
+        ("policy", "COVERS", "loss of profit after insured damage"),
+    ],
+    "Exclusions": [
+        ("policy", "EXCLUDES", "war and nuclear risks"),
+        ("policy", "EXCLUDES", "wear and tear"),
+    ],
+    "Limits": [("policy", "LIMIT", "sum insured of 50 lakh per location")],
+    "Conditions": [("policy", "REQUIRES", "burglar alarm maintained in working order")],
+    "Definitions": [("stock", "DEFINED_AS", "goods held for sale in the ordinary course")],
+}
+
+SAMPLE_NEEDS = {
+    "risks": {
+        "physical": ["fire", "theft"],
+        "liability": [],
+        "operational": ["business interruption"],
+        "people": [],
+        "industry_specific": [],
+    },
+    "mandatory": ["burglary_theft_cover", "loss_of_profit", "property_fire_cover"],
+    "optional": [],
+}
+
+SAMPLE_COMPARISON = {
+    "available": ["burglary and theft of stock", "fire and allied perils"],
+    "mandatory_covered": ["burglary_theft_cover", "property_fire_cover"],
+    "mandatory_missing": ["loss_of_profit"],
+    "optional_covered": [],
+    "optional_missing": [],
+}
+
+
+def sample_prompts():
+    profile = {
+        category: [{"head": h, "relation": r, "tail": t} for h, r, t in rows]
+        for category, rows in SAMPLE_ROWS.items()
+    }
+    formatted, _ = format_single_policy(SAMPLE_POLICY, {SAMPLE_POLICY: SAMPLE_ROWS})
+
+    return {
+        "explain_policy": build_explain_prompt(SAMPLE_POLICY, profile),
+        "explain_single_policy": build_single_policy_prompt(formatted),
+        "explain_policy_vs_risks": build_comparison_prompt(
+            SAMPLE_POLICY, SAMPLE_NEEDS, SAMPLE_COMPARISON
+        ),
+    }
+
+
+# ---------------------------------------------------
+# BENCHMARKS
+# ---------------------------------------------------
+
+def _tokens_per_second(prompt, runs, max_new_tokens, **kwargs):
+    tokenizer, _ = get_local_model()
+    messages = [{"role": "user", "content": prompt}]
+
+    tokens = 0
+    elapsed = 0.0
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = _chat_single(messages, max_new_tokens, temperature=0, **kwargs)
+        elapsed += time.perf_counter() - start
+        tokens += len(tokenizer(out, add_special_tokens=False).input_ids)
+
+    return tokens / elapsed if elapsed else 0.0
+
+
+def bench_prompt_lookup(args):
+    get_local_model()
+
+    print(f"{'template':<26}{'baseline tok/s':>16}{'lookup tok/s':>14}{'speedup':>9}")
+
+    for name, prompt in sample_prompts().items():
+        base = _tokens_per_second(prompt, args.runs, args.max_new_tokens)
+        fast = _tokens_per_second(
+            prompt, args.runs, args.max_new_tokens,
+            prompt_lookup=prompt_lookup_tokens(name.upper()) or 10,
+        )
+        print(f"{name:<26}{base:>16.1f}{fast:>14.1f}{fast / base if base else 0:>8.2f}x")
+
+
+def bench_quant(args):
+    prompt = RISK_PROMPT.replace(
+        "{TEXT}", "I run a sneaker store. Theft and fire are big risks."
+    )
+
+    print(f"{'mode':<8}{'load s':>8}{'weights MB':>12}{'tok/s':>9}{'json ok':>9}")
+
+    for mode in args.modes:
+        start = time.perf_counter()
+        tokenizer, model = load_local_model(mode)
+        load_s = time.perf_counter() - start
+
+        inputs = tokenizer(
+            [_render(tokenizer, [{"role": "user", "content": prompt}])],
+            return_tensors="pt",
+        )
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            generated = model.generate(
+                **inputs,
+                max_new_tokens=args.max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+            )
+        elapsed = time.perf_counter() - start
+        tokens = generated.shape[1] - inputs.input_ids.shape[1]
+
+        print(
+            f"{mode:<8}{load_s:>8.1f}{model_memory_bytes(model) / 2**20:>12.1f}"
+            f"{tokens / elapsed:>9.1f}{str(check_risk_json(tokenizer, model)):>9}"
+        )
+
+        del model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("prompt-lookup", help="tokens/s with and without prompt-lookup decoding")
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--max-new-tokens", type=int, default=200)
+    p.set_defaults(func=bench_prompt_lookup)
+
+    p = sub.add_parser("quant", help="memory footprint and tokens/s per precision mode")
+    p.add_argument("--modes", nargs="+", choices=QUANT_MODES, default=list(QUANT_MODES))
+    p.add_argument("--max-new-tokens", type=int, default=200)
+    p.set_defaults(func=bench_quant)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,9 @@ if not AI_PROVIDER:
     raise RuntimeError("AI_PROVIDER not set (local | openrouter)")
 
 if AI_PROVIDER == "openrouter":
-    from src.openrouter_llm import chat as _chat
+    from src.openrouter_llm import chat as _chat, chat_stream as _chat_stream
 elif AI_PROVIDER == "local":
-    from src.local_llm import chat as _chat
+    from src.local_llm import chat as _chat, chat_stream as _chat_stream
 else:
     raise RuntimeError(f"Unknown AI_PROVIDER: {AI_PROVIDER}")
 
@@ -17,3 +17,7 @@ print(AI_PROVIDER)
 
 def chat(messages, **kwargs) -> str:
     return _chat(messages, **kwargs)
+
+
+def chat_stream(messages, **kwargs):
+    return _chat_stream(messages, **kwargs)
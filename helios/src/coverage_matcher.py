@@ -1,31 +1,30 @@
-from .local_llm import chat
+from .local_llm import chat, chat_stream, prompt_lookup_tokens
+from .graph_index import get_graph_index
+from .semantic_match import match_needs, score_needs, score_exclusions, SEMANTIC_THRESHOLD
+from .fanout import fan_out
 import json
+import numpy as np
 
 
 def policy_covers(G, policy_name: str):
     """
     Returns a set of normalized cover strings that the policy actually covers.
     """
-    covers = set()
-
-    for u, v, data in G.edges(data=True):
-        if data.get("source") != policy_name:
-            continue
-
-        relation = data.get("relation", "").upper()
-
-        if relation in ["COVERS", "INCLUDES", "INSURED", "APPLIES_TO"]:
-            covers.add(v.lower().strip())
-
-    return covers
+    return get_graph_index(G).covers.get(policy_name, set())
 
 
 def compare_policy_with_needs(G, policy_name: str, needs: dict):
     """
     needs = output of policy_precheck()
+
+    A need counts as covered when one of the policy's covered terms matches
+    it and no excluded term rules it out (see semantic_match);
+    evidence[need] names the covered term and its score, excluded[need]
+    the exclusion.
     """
 
     available = policy_covers(G, policy_name)
+    evidence, excluded = match_needs(G, policy_name, needs["mandatory"] + needs["optional"])
 
     mandatory_missing = []
     mandatory_covered = []
@@ -34,13 +33,13 @@ def compare_policy_with_needs(G, policy_name: str, needs: dict):
     optional_covered = []
 
     for item in needs["mandatory"]:
-        if item.replace("_", " ") in available:
+        if item in evidence:
             mandatory_covered.append(item)
         else:
             mandatory_missing.append(item)
 
     for item in needs["optional"]:
-        if item.replace("_", " ") in available:
+        if item in evidence:
             optional_covered.append(item)
         else:
             optional_missing.append(item)
@@ -50,26 +49,140 @@ def compare_policy_with_needs(G, policy_name: str, needs: dict):
         "mandatory_covered": mandatory_covered,
         "mandatory_missing": mandatory_missing,
         "optional_covered": optional_covered,
-        "optional_missing": optional_missing
+        "optional_missing": optional_missing,
+        "evidence": evidence,
+        "excluded": excluded,
     }
 
 
 
 
-def explain_policy_vs_risks(policy_name: str, needs: dict, comparison: dict):
-    prompt = f"""
-You are an insurance assistant.
+def coverage_matrix(G, needs: dict, top_k: int = 3, explain: bool = False):
+    """
+    Scores every need against every policy in one pass.
 
-POLICY NAME:
-{policy_name}
+    matrix[i][j] is the best score of needs i against any covered term of
+    policies j, or 0 where one of the policy's exclusions rules the need
+    out; ranking orders policies by mandatory needs covered, then optional
+    ones, each entry carrying a compare_policy_with_needs-style comparison.
+    With explain, only the top_k policies get an LLM explanation.
+    """
+    mandatory = needs["mandatory"]
+    items = mandatory + needs["optional"]
+    policies = get_graph_index(G).sources
+
+    # Every term scored in one pass, then a segment max per policy
+    vectors, scores = score_needs(G, items)
+    _, exclusion_scores = score_exclusions(G, items)
+
+    matrix = _per_policy(scores, vectors.spans, policies, len(items))
+    excluded_matrix = _per_policy(exclusion_scores, vectors.excluded_spans, policies, len(items))
+
+    ruled_out = excluded_matrix >= SEMANTIC_THRESHOLD
+    matrix[ruled_out] = 0
+    covered = matrix >= SEMANTIC_THRESHOLD
+    ranking = []
+
+    for j, policy in enumerate(policies):
+        evidence = _evidence(covered[:, j], scores, vectors.terms, vectors.spans.get(policy), items)
+        excluded = _evidence(
+            ruled_out[:, j], exclusion_scores, vectors.excluded,
+            vectors.excluded_spans.get(policy), items,
+        )
+
+        ranking.append({
+            "policy": policy,
+            "mandatory_score": float(matrix[:len(mandatory), j].sum()),
+            "comparison": {
+                "available": sorted(policy_covers(G, policy)),
+                "mandatory_covered": [n for n in mandatory if n in evidence],
+                "mandatory_missing": [n for n in mandatory if n not in evidence],
+                "optional_covered": [n for n in needs["optional"] if n in evidence],
+                "optional_missing": [n for n in needs["optional"] if n not in evidence],
+                "evidence": evidence,
+                "excluded": excluded,
+            },
+        })
+
+    ranking.sort(key=lambda r: (
+        -len(r["comparison"]["mandatory_covered"]),
+        -len(r["comparison"]["optional_covered"]),
+        -r["mandatory_score"],
+        r["policy"],
+    ))
+
+    explanations = {}
+    if explain and top_k > 0:
+        top = ranking[:top_k]
+        texts, _ = fan_out(
+            lambda r: explain_policy_vs_risks(r["policy"], needs, r["comparison"]),
+            top,
+        )
+        explanations = {r["policy"]: text for r, text in zip(top, texts)}
 
-RISK ANALYSIS:
-{json.dumps(needs, indent=2)}
+    return {
+        "needs": items,
+        "policies": policies,
+        "matrix": np.round(matrix.astype(float), 3).tolist(),
+        "threshold": SEMANTIC_THRESHOLD,
+        "ranking": [
+            {
+                "policy": r["policy"],
+                "mandatory_covered": len(r["comparison"]["mandatory_covered"]),
+                "mandatory_total": len(mandatory),
+                "optional_covered": len(r["comparison"]["optional_covered"]),
+                "comparison": r["comparison"],
+            }
+            for r in ranking
+        ],
+        "explanations": explanations,
+    }
 
-POLICY COVERAGE COMPARISON:
-{json.dumps(comparison, indent=2)}
 
-Explain clearly:
+def _per_policy(scores, spans, policies, rows):
+    """
+    Best score per policy column, from term scores grouped by source spans.
+    """
+    matrix = np.zeros((rows, len(policies)), dtype=np.float32)
+    with_terms = [p for p in policies if p in spans]
+
+    if rows and with_terms:
+        starts = [spans[p][0] for p in with_terms]
+        columns = [policies.index(p) for p in with_terms]
+        matrix[:, columns] = np.maximum.reduceat(scores, starts, axis=1)
+
+    return matrix
+
+
+def _evidence(flags, scores, terms, span, items):
+    """
+    {need: {"term", "score"}} for the flagged needs, from one policy's span.
+    """
+    evidence = {}
+    if span is None:
+        return evidence
+
+    start, stop = span
+    for i in np.flatnonzero(flags):
+        best = int(scores[i, start:stop].argmax())
+        evidence[items[i]] = {
+            "term": terms[start + best],
+            "score": round(float(scores[i, start + best]), 3),
+        }
+
+    return evidence
+
+
+# Prompt-lookup draft length for comparison explanations (chat and stream)
+EXPLAIN_COMPARISON_LOOKUP_TOKENS = prompt_lookup_tokens("EXPLAIN_POLICY_VS_RISKS")
+
+# Constant part of the comparison prompt, kept first so its KV cache can be
+# reused across requests; the policy and JSON follow it.
+EXPLAIN_COMPARISON_PREFIX = """
+You are an insurance assistant.
+
+Using the policy name, risk analysis and coverage comparison JSON below,
+explain clearly:
 
 SUMMARY
 What kind of business risks this user has.
@@ -90,6 +203,38 @@ Important rules:
 - Use clear bullet points
 """
 
-    return chat([
-        {"role": "user", "content": prompt}
-    ])
+
+def build_comparison_prompt(policy_name: str, needs: dict, comparison: dict) -> str:
+    return EXPLAIN_COMPARISON_PREFIX + f"""
+POLICY NAME:
+{policy_name}
+
+RISK ANALYSIS:
+{json.dumps(needs, indent=2)}
+
+POLICY COVERAGE COMPARISON:
+{json.dumps(comparison, indent=2)}
+"""
+
+
+def explain_policy_vs_risks(policy_name: str, needs: dict, comparison: dict):
+    prompt = build_comparison_prompt(policy_name, needs, comparison)
+
+    return chat(
+        [{"role": "user", "content": prompt}],
+        prefix=EXPLAIN_COMPARISON_PREFIX,
+        prompt_lookup=EXPLAIN_COMPARISON_LOOKUP_TOKENS,
+    )
+
+
+def stream_policy_vs_risks(policy_name: str, needs: dict, comparison: dict):
+    """
+    explain_policy_vs_risks, yielding the explanation piece by piece.
+    """
+    prompt = build_comparison_prompt(policy_name, needs, comparison)
+
+    return chat_stream(
+        [{"role": "user", "content": prompt}],
+        prefix=EXPLAIN_COMPARISON_PREFIX,
+        prompt_lookup=EXPLAIN_COMPARISON_LOOKUP_TOKENS,
+    )
@@ -1,5 +1,9 @@
 from .policy_profile import build_policy_profile
-from .local_llm import chat
+from .local_llm import chat, prompt_lookup_tokens
+
+
+# Prompt-lookup draft length for single-policy explanations
+EXPLAIN_SINGLE_POLICY_LOOKUP_TOKENS = prompt_lookup_tokens("EXPLAIN_SINGLE_POLICY")
 
 
 def format_single_policy(policy_name, profiles):
@@ -22,15 +26,8 @@ def format_single_policy(policy_name, profiles):
     return formatted, None
 
 
-def explain_single_policy(policy_name, G):
-    profiles = build_policy_profile(G)
-
-    formatted, err = format_single_policy(policy_name, profiles)
-
-    if err:
-        return err
-
-    prompt = f"""
+def build_single_policy_prompt(formatted: str) -> str:
+    return f"""
 You are analyzing ONE insurance policy.
 
 Use ONLY the facts below:
@@ -63,6 +60,16 @@ If anything is unclear, say: "not specified in the provided text".
 Do NOT invent details.
 """
 
-    return chat([
-        {"role": "user", "content": prompt}
-    ])
+
+def explain_single_policy(policy_name, G):
+    profiles = build_policy_profile(G)
+
+    formatted, err = format_single_policy(policy_name, profiles)
+
+    if err:
+        return err
+
+    return chat(
+        [{"role": "user", "content": build_single_policy_prompt(formatted)}],
+        prompt_lookup=EXPLAIN_SINGLE_POLICY_LOOKUP_TOKENS,
+    )
@@ -0,0 +1,98 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# Max LLM calls in flight across the whole process, how long a single call
+# may run before its result is given up on, and how long one fan-out may
+# take in total, queueing included.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "90"))
+LLM_FANOUT_DEADLINE = float(os.getenv("LLM_FANOUT_DEADLINE", "180"))
+
+# A running thread cannot be stopped: a call that is given up on keeps its
+# slot until the backend returns. That is bounded by the backends' own
+# limits: OPENROUTER_TIMEOUT per attempt (times OPENROUTER_MAX_RETRIES),
+# LOCAL_WORKER_TIMEOUT with worker processes, and max_new_tokens of
+# generation in-process. Queued calls that are given up on are cancelled
+# and never take a slot.
+_pool = ThreadPoolExecutor(max_workers=LLM_CONCURRENCY, thread_name_prefix="llm")
+
+
+def fan_out_iter(
+    fn,
+    items,
+    timeout: float = LLM_CALL_TIMEOUT,
+    deadline: float = LLM_FANOUT_DEADLINE,
+):
+    """
+    Run fn(item) for every item on the shared LLM pool, yielding
+    (index, result, error) as each call finishes, fails or times out.
+
+    A call times out timeout seconds after it starts running; any call
+    still queued or running deadline seconds after the fan-out began is
+    given up on too, so a pool full of stuck calls cannot stall it.
+    """
+    items = list(items)
+    started = {}
+    began = time.monotonic()
+
+    def run(i, item):
+        started[i] = time.monotonic()
+        return fn(item)
+
+    futures = {_pool.submit(run, i, item): i for i, item in enumerate(items)}
+    pending = set(futures)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                i = futures[future]
+                try:
+                    yield i, future.result(), None
+                except Exception as e:
+                    yield i, None, e
+
+            now = time.monotonic()
+
+            for future in list(pending):
+                i = futures[future]
+
+                # The per-call clock starts when a call begins running, not when it is queued
+                if i in started and now - started[i] > timeout:
+                    error = TimeoutError(f"LLM call exceeded {timeout}s")
+                elif now - began > deadline:
+                    error = TimeoutError(f"LLM fan-out exceeded {deadline}s")
+                else:
+                    continue
+
+                future.cancel()
+                pending.discard(future)
+                yield i, None, error
+    finally:
+        # Consumer stopped early or everything left was given up on
+        for future in pending:
+            future.cancel()
+
+
+def fan_out(fn, items, timeout: float = LLM_CALL_TIMEOUT, deadline: float = LLM_FANOUT_DEADLINE):
+    """
+    Run fn(item) for every item on the shared LLM pool.
+
+    Returns (results, errors): results[i] is None wherever errors[i] holds
+    the exception (or TimeoutError) for that item, so callers can return
+    partial results when some calls fail.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = {}
+
+    for i, result, error in fan_out_iter(fn, items, timeout, deadline):
+        if error is None:
+            results[i] = result
+        else:
+            errors[i] = error
+
+    return results, errors
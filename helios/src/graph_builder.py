@@ -1,11 +1,38 @@
 import networkx as nx
 
+from .graph_index import bump_version
+
+
+def add_triplets(G, source_name: str, triplets):
+    # Keyed by source: documents sharing (head, tail) keep their own edge,
+    # so removing one document never touches another's
+    for h, r, t in triplets:
+        G.add_edge(h, t, key=source_name, relation=r, source=source_name)
+
+    bump_version(G)
+
+
+def remove_source(G, source_name: str):
+    """
+    Drop every edge extracted from source_name, plus nodes left isolated.
+    """
+    edges = [
+        (u, v, key)
+        for u, v, key in G.edges(keys=True)
+        if key == source_name
+    ]
+    G.remove_edges_from(edges)
+
+    touched = {n for u, v, _ in edges for n in (u, v)}
+    G.remove_nodes_from([n for n in touched if G.degree(n) == 0])
+
+    bump_version(G)
+
 
 def build_graph(triplet_map: dict):
-    G = nx.DiGraph()
+    G = nx.MultiDiGraph()
 
     for source_name, triplets in triplet_map.items():
-        for h, r, t in triplets:
-            G.add_edge(h, t, relation=r, source=source_name)
+        add_triplets(G, source_name, triplets)
 
     return G
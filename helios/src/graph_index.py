@@ -0,0 +1,145 @@
+import threading
+import weakref
+
+import numpy as np
+
+
+# ---------------------------------------
+# Relation → Category mapping
+# ---------------------------------------
+
+COMPARISON_MAP = {
+    # Coverages
+    "COVERS": "Coverages",
+    "INCLUDES": "Coverages",
+    "INSURED": "Coverages",
+    "APPLIES_TO": "Coverages",
+
+    # Exclusions
+    "EXCLUDES": "Exclusions",
+    "EXCLUDED_FROM": "Exclusions",
+
+    # Limits
+    "LIMIT": "Limits",
+    "SUM_INSURED": "Limits",
+
+    # Conditions
+    "REQUIRES": "Conditions",
+    "MUST": "Conditions",
+    "OBLIGATION": "Conditions",
+
+    # Definitions
+    "DEFINED_AS": "Definitions",
+    "DEFINED_IN": "Definitions",
+}
+
+CATEGORIES = ["Coverages", "Exclusions", "Limits", "Conditions", "Definitions"]
+
+# Relations whose tail counts as something the policy covers
+COVER_RELATIONS = {"COVERS", "INCLUDES", "INSURED", "APPLIES_TO"}
+
+# Relations naming something the policy excludes (the tail of EXCLUDES,
+# the head of EXCLUDED_FROM)
+EXCLUDE_RELATIONS = {"EXCLUDES", "EXCLUDED_FROM"}
+
+
+class GraphIndex:
+    """
+    Per-source view of the knowledge graph, built in a single edge scan.
+
+    profiles[source][category]  -> [{"head", "relation", "tail"}, ...]
+    rows[source][category]      -> [(head, relation, tail), ...]
+    covers[source]              -> {normalized covered term, ...}
+    excludes[source]            -> {normalized excluded term, ...}
+    sources                     -> sorted policy names
+    """
+
+    def __init__(self, G):
+        self.version = graph_version(G)
+        self.profiles = {}
+        self.rows = {}
+        self.covers = {}
+        self.excludes = {}
+        self._named = set()
+
+        # A stored graph exposes its arrays: labels are decoded once and
+        # edges read source by source instead of one attribute dict each
+        if hasattr(G, "edge_arrays"):
+            self._scan_arrays(*G.edge_arrays())
+        else:
+            for u, v, data in G.edges(data=True):
+                self._add(u, v, data.get("relation", "").upper(), data.get("source"))
+
+        self.sources = sorted(self._named)
+
+    def _scan_arrays(self, labels, heads, tails, relations, source_keys, source_offsets):
+        upper = {r: labels[r].upper() if r >= 0 else "" for r in np.unique(relations).tolist()}
+        offsets = source_offsets.tolist()
+
+        for i, key in enumerate(source_keys.tolist()):
+            source = labels[key] if key >= 0 else None
+            start, stop = offsets[i], offsets[i + 1]
+
+            for u, v, r in zip(
+                heads[start:stop].tolist(),
+                tails[start:stop].tolist(),
+                relations[start:stop].tolist(),
+            ):
+                self._add(labels[u], labels[v], upper[r], source)
+
+    def _add(self, u, v, relation, source):
+        if source:
+            self._named.add(source)
+
+        if source and relation in COVER_RELATIONS:
+            self.covers.setdefault(source, set()).add(v.lower().strip())
+
+        if source and relation in EXCLUDE_RELATIONS:
+            term = v if relation == "EXCLUDES" else u
+            self.excludes.setdefault(source, set()).add(term.lower().strip())
+
+        category = COMPARISON_MAP.get(relation)
+        if not category:
+            return
+
+        source = source or "UNKNOWN"
+
+        if source not in self.profiles:
+            self.profiles[source] = {c: [] for c in CATEGORIES}
+            self.rows[source] = {c: [] for c in CATEGORIES}
+
+        self.profiles[source][category].append({
+            "head": u,
+            "relation": relation,
+            "tail": v,
+        })
+        self.rows[source][category].append((u, relation, v))
+
+
+def graph_version(G) -> int:
+    return G.graph.get("version", 0)
+
+
+def bump_version(G):
+    """
+    Call after every in-place mutation so derived indexes are rebuilt.
+    """
+    G.graph["version"] = graph_version(G) + 1
+
+
+_indexes = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_graph_index(G) -> GraphIndex:
+    """
+    Returns the index for G, building it once per graph version.
+    """
+    with _lock:
+        index = _indexes.get(G)
+
+        if index is None or index.version != graph_version(G):
+            index = GraphIndex(G)
+            _indexes[G] = index
+
+        return index
@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+
+from .graph_index import get_graph_index, graph_version
+from .graph_store import current_version, load_compact_graph
+from .semantic_match import get_coverage_vectors
+
+
+# How often (seconds) readers check the store for a version saved elsewhere
+GRAPH_RELOAD_INTERVAL = float(os.getenv("GRAPH_RELOAD_INTERVAL", "2"))
+
+
+class GraphSnapshot:
+    """
+    A published, read-only graph together with its derived indexes, all
+    built for the same version before anyone can see them.
+
+    Readers take one snapshot at the start of a request and use it
+    throughout, so a concurrent rebuild never changes what they see.
+    """
+
+    __slots__ = ("version", "graph", "index", "vectors")
+
+    def __init__(self, G):
+        self.version = graph_version(G)
+        self.graph = G
+        self.index = get_graph_index(G)
+        self.vectors = get_coverage_vectors(G)
+
+
+_current = None
+
+# Serializes writers only; readers never take it
+_rebuild_lock = threading.Lock()
+
+# Store watched for versions saved by other processes (see watch_store)
+_store_root = None
+_checked_at = 0.0
+
+
+def watch_store(root):
+    """
+    Make current_snapshot() pick up versions other processes save to root.
+    """
+    global _store_root
+    _store_root = root
+
+
+def _reload_if_stale():
+    """
+    At most once per GRAPH_RELOAD_INTERVAL, publish the stored graph if it
+    is newer than the current one. Skipped while a rebuild is running; the
+    rebuild publishes the newest version itself.
+    """
+    global _checked_at
+
+    now = time.monotonic()
+    if _store_root is None or now - _checked_at < GRAPH_RELOAD_INTERVAL:
+        return
+    _checked_at = now
+
+    stored = current_version(_store_root)
+    if stored is None or _current is None or stored <= _current.version:
+        return
+
+    if not _rebuild_lock.acquire(blocking=False):
+        return
+    try:
+        G = load_compact_graph(_store_root)
+        if G is not None and graph_version(G) > _current.version:
+            publish_graph(G)
+    finally:
+        _rebuild_lock.release()
+
+
+def current_snapshot() -> GraphSnapshot:
+    _reload_if_stale()
+    return _current
+
+
+def publish_graph(G) -> GraphSnapshot:
+    """
+    Build the snapshot for G off to the side, then make it current with a
+    single reference assignment.
+    """
+    global _current
+
+    snapshot = GraphSnapshot(G)
+    _current = snapshot
+
+    print(f"📌 Published knowledge graph v{snapshot.version}")
+    return snapshot
+
+
+def rebuild_graph(update) -> GraphSnapshot:
+    """
+    Run update(G) on the current graph and publish the result if it
+    changed. update must not modify G, only return a new graph (or G
+    itself when nothing changed). In-flight requests keep the snapshot
+    they started with.
+    """
+    with _rebuild_lock:
+        base = _current
+        G = update(base.graph)
+
+        if G is base.graph or graph_version(G) == base.version:
+            return base
+
+        return publish_graph(G)
@@ -0,0 +1,270 @@
+import os
+import json
+import fcntl
+import shutil
+from pathlib import Path
+from contextlib import contextmanager
+
+import numpy as np
+import networkx as nx
+
+from .graph_index import graph_version
+
+
+FORMAT_VERSION = 1
+
+# Stored versions kept besides CURRENT, for processes still mapping them
+GRAPH_STORE_KEEP = int(os.getenv("GRAPH_STORE_KEEP", "3"))
+
+# File names inside one stored graph directory
+_ARRAYS = (
+    "string_offsets",  # int64, n_strings + 1: byte offsets into strings
+    "strings",         # uint8: UTF-8 bytes of every interned label
+    "nodes",           # int32: string id of every node
+    "heads",           # int32: string id per edge, edges grouped by source
+    "tails",           # int32
+    "relations",       # int32 (-1 = no relation)
+    "source_keys",     # int32: string id of each source (-1 = no source)
+    "source_offsets",  # int64, n_sources + 1: edge range of each source
+)
+
+
+# ---------------------------------------------------
+# READ-ONLY GRAPH OVER THE STORE
+# ---------------------------------------------------
+
+class CompactGraph:
+    """
+    Read-only knowledge graph backed by memory-mapped NumPy arrays.
+
+    Offers the subset of the graph API the readers use (edges(data=True),
+    .graph, nodes(), counts); copy()/to_networkx() give a mutable
+    MultiDiGraph keyed by source for rebuilds. Several processes opening
+    the same store share its pages through the page cache.
+    """
+
+    def __init__(self, path: Path):
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+
+        self.path = path
+        self.graph = dict(meta.get("graph", {}))
+
+        for name in _ARRAYS:
+            setattr(self, "_" + name, np.load(path / f"{name}.npy", mmap_mode="r"))
+
+        self._labels = None
+
+    @property
+    def labels(self) -> list:
+        """
+        Every interned string, decoded once on first use.
+        """
+        if self._labels is None:
+            data = self._strings.tobytes()
+            offsets = self._string_offsets.tolist()
+            self._labels = [
+                data[start:stop].decode("utf-8")
+                for start, stop in zip(offsets, offsets[1:])
+            ]
+        return self._labels
+
+    def label(self, string_id: int):
+        return self.labels[string_id] if string_id >= 0 else None
+
+    def edge_arrays(self):
+        """
+        (labels, heads, tails, relations, source_keys, source_offsets) for
+        readers that scan the edges in bulk (see GraphIndex).
+        """
+        return (
+            self.labels, self._heads, self._tails, self._relations,
+            self._source_keys, self._source_offsets,
+        )
+
+    def _sources(self):
+        """
+        (source label, start, stop) of every source's edge range.
+        """
+        offsets = self._source_offsets.tolist()
+        for i, key in enumerate(self._source_keys.tolist()):
+            yield self.label(key), offsets[i], offsets[i + 1]
+
+    def _edge_range(self, start: int, stop: int, source, data: bool):
+        labels = self.labels
+        heads = self._heads[start:stop].tolist()
+        tails = self._tails[start:stop].tolist()
+        relations = self._relations[start:stop].tolist()
+
+        for h, t, r in zip(heads, tails, relations):
+            if not data:
+                yield labels[h], labels[t]
+                continue
+
+            # Same attributes the graph had: missing ones stay missing
+            attrs = {}
+            if r >= 0:
+                attrs["relation"] = labels[r]
+            if source is not None:
+                attrs["source"] = source
+            yield labels[h], labels[t], attrs
+
+    def edges(self, data: bool = False):
+        for source, start, stop in self._sources():
+            yield from self._edge_range(start, stop, source, data)
+
+    def source_edges(self, source: str, data: bool = False):
+        """
+        Edges of one source document, read through the per-source offsets.
+        """
+        for name, start, stop in self._sources():
+            if name == source:
+                return self._edge_range(start, stop, source, data)
+        return iter(())
+
+    def nodes(self):
+        labels = self.labels
+        return [labels[n] for n in self._nodes.tolist()]
+
+    def number_of_nodes(self) -> int:
+        return len(self._nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self._heads)
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        G = nx.MultiDiGraph()
+        G.graph.update(self.graph)
+        G.add_nodes_from(self.nodes())
+
+        for source, start, stop in self._sources():
+            G.add_edges_from(
+                (u, v, source, attrs)
+                for u, v, attrs in self._edge_range(start, stop, source, data=True)
+            )
+
+        return G
+
+    def copy(self) -> nx.MultiDiGraph:
+        return self.to_networkx()
+
+
+# ---------------------------------------------------
+# WRITE / OPEN
+# ---------------------------------------------------
+
+@contextmanager
+def store_lock(root: Path):
+    """
+    Exclusive lock on the store across processes (flock on root/LOCK).
+    Writers hold it from reading CURRENT until the new version is saved.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+
+    with open(root / "LOCK", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_version(root: Path):
+    """
+    Version CURRENT points at, or None if nothing is stored.
+    """
+    try:
+        return int((root / "CURRENT").read_text().strip()[1:])
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _stored_versions(root: Path) -> list:
+    versions = []
+    for path in root.iterdir():
+        if path.is_dir() and path.name.startswith("v") and path.name[1:].isdigit():
+            versions.append(int(path.name[1:]))
+    return sorted(versions)
+
+
+def save_compact_graph(G, root: Path):
+    """
+    Write G under root/v<version>/ and point root/CURRENT at it with an
+    atomic rename. Call under store_lock.
+
+    The version CURRENT points at is never rewritten: a G built from a
+    stale base raises instead of replacing a directory other processes
+    have mapped. The newest GRAPH_STORE_KEEP older versions are kept for
+    processes that have not reloaded yet.
+    """
+    if current_version(root) == graph_version(G):
+        raise RuntimeError(f"Graph v{graph_version(G)} is already stored")
+
+    strings = {}
+
+    def intern(s):
+        if s is None:
+            return -1
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    nodes = [intern(n) for n in G.nodes()]
+
+    by_source = {}
+    for u, v, data in G.edges(data=True):
+        by_source.setdefault(intern(data.get("source")), []).append(
+            (intern(u), intern(v), intern(data.get("relation")))
+        )
+
+    source_keys = sorted(by_source)
+    edges = [edge for key in source_keys for edge in by_source[key]]
+    counts = [len(by_source[key]) for key in source_keys]
+
+    encoded = [s.encode("utf-8") for s in strings]
+    arrays = {
+        "string_offsets": np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.int64),
+        "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "nodes": np.array(nodes, dtype=np.int32),
+        "heads": np.array([e[0] for e in edges], dtype=np.int32),
+        "tails": np.array([e[1] for e in edges], dtype=np.int32),
+        "relations": np.array([e[2] for e in edges], dtype=np.int32),
+        "source_keys": np.array(source_keys, dtype=np.int32),
+        "source_offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+    }
+
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"v{graph_version(G)}"
+    target = root / name
+    tmp = root / f"{name}.tmp"
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+
+    for key, array in arrays.items():
+        np.save(tmp / f"{key}.npy", array)
+
+    with open(tmp / "meta.json", "w") as f:
+        json.dump({"format": FORMAT_VERSION, "graph": dict(G.graph)}, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+    pointer = root / "CURRENT.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, root / "CURRENT")
+
+    older = [v for v in _stored_versions(root) if v != graph_version(G)]
+    for version in older[:max(len(older) - GRAPH_STORE_KEEP, 0)]:
+        shutil.rmtree(root / f"v{version}", ignore_errors=True)
+
+
+def load_compact_graph(root: Path):
+    """
+    Open the current stored graph, or None if there is none.
+    """
+    pointer = root / "CURRENT"
+    if not pointer.exists():
+        return None
+
+    return CompactGraph(root / pointer.read_text().strip())
@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+
+from .pdf_reader import iter_documents
+from .triplets import iter_chunks, extract_chunk_triplets, dedupe_triplets, TRIPLET_WORKERS
+from .graph_builder import add_triplets
+
+
+# Max items buffered between stages; this is what keeps memory flat.
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "16"))
+
+_DONE = object()
+
+
+def _report(progress, **counts):
+    if progress is not None:
+        progress(**counts)
+
+
+def _counted_pages(pages, progress):
+    for page in pages:
+        _report(progress, pages=1)
+        yield page
+
+
+# ---------------------------------------------------
+# STAGES
+# ---------------------------------------------------
+
+def _read_chunks(paths, chunk_q, stop, progress=None):
+    """
+    Stage 1: PDF pages -> chunks, one document after another (page
+    extraction already runs ahead into the next documents).
+    """
+    try:
+        for path, pages in iter_documents(paths):
+            name = os.path.basename(path)
+            print(f"Processing: {name}")
+
+            for chunk in iter_chunks(_counted_pages(pages, progress)):
+                if stop.is_set():
+                    return
+                _report(progress, chunks_read=1)
+                chunk_q.put((name, chunk))
+
+            _report(progress, documents=1)
+    except Exception as e:
+        chunk_q.put((None, e))
+    finally:
+        for _ in range(TRIPLET_WORKERS):
+            chunk_q.put(_DONE)
+
+
+def _extract(chunk_q, triplet_q, stop):
+    """
+    Stage 2: chunks -> parsed triplets (LLM / cache).
+    """
+    while True:
+        item = chunk_q.get()
+
+        if item is _DONE:
+            triplet_q.put(_DONE)
+            return
+
+        name, chunk = item
+
+        if name is None:
+            triplet_q.put(item)
+            continue
+
+        if stop.is_set():
+            continue
+
+        try:
+            triplet_q.put((name, extract_chunk_triplets(chunk)))
+        except Exception as e:
+            triplet_q.put((None, e))
+
+
+def stream_triplets(paths, progress=None):
+    """
+    Yield (document name, triplets) per chunk as soon as each chunk is
+    extracted. Reading, extraction and the consumer run concurrently with
+    bounded queues in between, so later PDFs are still being read while
+    the first triplets are already available.
+
+    progress, if given, is called from the reader thread with count
+    increments: pages=1 per page, chunks_read=1 per chunk, documents=1 per
+    finished PDF.
+    """
+    chunk_q = queue.Queue(maxsize=QUEUE_SIZE)
+    triplet_q = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+
+    threads = [threading.Thread(
+        target=_read_chunks, args=(paths, chunk_q, stop, progress), daemon=True
+    )]
+    threads += [
+        threading.Thread(target=_extract, args=(chunk_q, triplet_q, stop), daemon=True)
+        for _ in range(TRIPLET_WORKERS)
+    ]
+
+    for t in threads:
+        t.start()
+
+    remaining = TRIPLET_WORKERS
+
+    try:
+        while remaining:
+            item = triplet_q.get()
+
+            if item is _DONE:
+                remaining -= 1
+                continue
+
+            name, payload = item
+
+            if name is None:
+                raise payload
+
+            yield name, payload
+    finally:
+        # Unblock the stages if the consumer stopped early or failed.
+        stop.set()
+        while remaining:
+            if triplet_q.get() is _DONE:
+                remaining -= 1
+
+
+def ingest_into_graph(G, paths, progress=None):
+    """
+    Stream triplets from paths straight into G as edges, dropping repeats
+    within each document (chunks of one document often restate a clause).
+    progress additionally gets chunks=1 per chunk added to the graph.
+    """
+    seen = {}
+
+    for name, triplets in stream_triplets(paths, progress):
+        add_triplets(G, name, dedupe_triplets(triplets, seen.setdefault(name, set())))
+        _report(progress, chunks=1)
+
+    return G
@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+DATA_DIR = Path("./data")
+DATA_DIR.mkdir(exist_ok=True)
+
+JOBS_PATH = DATA_DIR / "jobs.sqlite"
+
+# Jobs mutate the shared graph, so by default they run one at a time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+
+# Progress counters are written to disk at most this often (seconds)
+JOB_FLUSH_INTERVAL = float(os.getenv("JOB_FLUSH_INTERVAL", "0.5"))
+
+# A running job's owner refreshes its heartbeat every JOB_LEASE / 3 seconds;
+# a job whose heartbeat is older than JOB_LEASE is taken over on resume.
+JOB_LEASE = float(os.getenv("JOB_LEASE", "30"))
+
+# Identifies this process as the owner of the jobs it claims
+_OWNER = uuid.uuid4().hex
+
+_lock = threading.Lock()
+_conn = None
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_handlers = {}
+
+
+# ---------------------------------------------------
+# STORAGE
+# ---------------------------------------------------
+
+def _get_conn():
+    global _conn
+
+    if _conn is None:
+        _conn = sqlite3.connect(JOBS_PATH, check_same_thread=False)
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                stages TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+            """
+        )
+
+        # Stores created before jobs had owners
+        columns = {row[1] for row in _conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                _conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+        _conn.commit()
+
+    return _conn
+
+
+def _row_to_job(row) -> dict:
+    job_id, kind, status, params, stages, result, error, created_at, updated_at = row
+    return {
+        "id": job_id,
+        "kind": kind,
+        "status": status,
+        "params": json.loads(params),
+        "stages": json.loads(stages),
+        "result": json.loads(result) if result else None,
+        "error": error,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+
+def _update(job_id: str, **fields):
+    fields["updated_at"] = time.time()
+    for key in ("stages", "result"):
+        if key in fields:
+            fields[key] = json.dumps(fields[key])
+
+    with _lock:
+        _get_conn().execute(
+            f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+            (*fields.values(), job_id),
+        )
+        _get_conn().commit()
+
+
+def get_job(job_id: str):
+    """
+    The stored job (status, per-stage progress, result), or None.
+    """
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT id, kind, status, params, stages, result, error, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+
+    return _row_to_job(row) if row else None
+
+
+# ---------------------------------------------------
+# RUNNING JOBS
+# ---------------------------------------------------
+
+class JobContext:
+    """
+    Handed to a job handler. Stages run through run_stage(); a stage that
+    finished before a restart is not run again, its stored output is
+    returned instead.
+
+    stages[name] -> {"status": "running" | "done" | "failed", counters...,
+                     "output": ... | "error": ...}
+    """
+
+    def __init__(self, job: dict):
+        self.id = job["id"]
+        self.params = job["params"]
+        self.stages = job["stages"]
+        self._flushed = 0.0
+        self._stage_lock = threading.Lock()
+
+    def _flush(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._flushed >= JOB_FLUSH_INTERVAL:
+            self._flushed = now
+            _update(self.id, stages=self.stages)
+
+    def run_stage(self, name: str, fn):
+        """
+        Run fn(progress) as stage name and store its (JSON-able) output;
+        progress(**counts) adds to the stage's counters. If fn raises, the
+        stage is stored as failed with the error, and the error propagates.
+        """
+        stage = self.stages.get(name)
+        if stage and stage["status"] == "done":
+            return stage.get("output")
+
+        # (Re)started stages count from zero
+        stage = self.stages[name] = {"status": "running"}
+        self._flush(force=True)
+
+        def progress(**counts):
+            with self._stage_lock:
+                for key, n in counts.items():
+                    stage[key] = stage.get(key, 0) + n
+                self._flush()
+
+        try:
+            output = fn(progress)
+        except Exception as e:
+            with self._stage_lock:
+                stage["status"] = "failed"
+                stage["error"] = f"{type(e).__name__}: {e}"
+                self._flush(force=True)
+            raise
+
+        with self._stage_lock:
+            stage["status"] = "done"
+            stage["output"] = output
+            self._flush(force=True)
+
+        return output
+
+
+def register_handler(kind: str, handler):
+    """
+    handler(ctx: JobContext) runs a job of this kind and returns its result.
+    """
+    _handlers[kind] = handler
+
+
+def _claim(job_id: str, status: str, owner, heartbeat_at) -> bool:
+    """
+    Atomically take job_id for this process, provided it is still in the
+    state it was seen in (status, owner and heartbeat). Of several
+    processes racing for the same job, exactly one wins.
+    """
+    now = time.time()
+
+    with _lock:
+        cursor = _get_conn().execute(
+            "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ? AND owner IS ? AND heartbeat_at IS ?",
+            (_OWNER, now, now, job_id, status, owner, heartbeat_at),
+        )
+        _get_conn().commit()
+
+    return cursor.rowcount == 1
+
+
+def _heartbeat(job_id: str, stop: threading.Event):
+    while not stop.wait(JOB_LEASE / 3):
+        with _lock:
+            _get_conn().execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ?",
+                (time.time(), job_id, _OWNER),
+            )
+            _get_conn().commit()
+
+
+def _run(job_id: str, status: str = "queued", owner=None, heartbeat_at=None):
+    if not _claim(job_id, status, owner, heartbeat_at):
+        return
+
+    job = get_job(job_id)
+    ctx = JobContext(job)
+
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, stop), daemon=True).start()
+    print(f"⚙️ Job {job_id} ({job['kind']}) started")
+
+    try:
+        result = _handlers[job["kind"]](ctx)
+    except Exception as e:
+        _update(job_id, status="failed", stages=ctx.stages, error=f"{type(e).__name__}: {e}")
+        print(f"❌ Job {job_id} failed: {e}")
+        return
+    finally:
+        stop.set()
+
+    _update(job_id, status="done", stages=ctx.stages, result=result)
+    print(f"✅ Job {job_id} done")
+
+
+def submit_job(kind: str, params: dict) -> str:
+    """
+    Store a new job and queue it on the job pool; returns its id.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+
+    with _lock:
+        _get_conn().execute(
+            "INSERT INTO jobs (id, kind, status, params, stages, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, '{}', ?, ?)",
+            (job_id, kind, json.dumps(params), now, now),
+        )
+        _get_conn().commit()
+
+    _pool.submit(_run, job_id)
+    return job_id
+
+
+def _take_over_when_stale(job_id: str):
+    """
+    Watch a job another process is running and take it over once its
+    heartbeat stops (the owner died); return when it finishes or is taken.
+    """
+    while True:
+        with _lock:
+            row = _get_conn().execute(
+                "SELECT status, owner, heartbeat_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        if row is None or row[0] != "running":
+            return
+
+        status, owner, heartbeat_at = row
+        if heartbeat_at is None or time.time() - heartbeat_at > JOB_LEASE:
+            _pool.submit(_run, job_id, status, owner, heartbeat_at)
+            return
+
+        time.sleep(JOB_LEASE / 3)
+
+
+def resume_jobs() -> list:
+    """
+    Re-queue jobs left queued or running by a previous process, oldest
+    first. Call at startup, after handlers are registered; safe to call
+    from every worker process, each job is claimed by exactly one.
+
+    Running jobs are taken over only once their owner's heartbeat is older
+    than JOB_LEASE, so a job still alive in another worker is left alone.
+    """
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT id, kind, status, owner, heartbeat_at FROM jobs "
+            "WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+
+    resumed = []
+    for job_id, kind, status, owner, heartbeat_at in rows:
+        if kind not in _handlers:
+            continue
+
+        if status == "queued":
+            _pool.submit(_run, job_id, status, owner, heartbeat_at)
+        else:
+            threading.Thread(
+                target=_take_over_when_stale, args=(job_id,), daemon=True
+            ).start()
+        resumed.append(job_id)
+
+    if resumed:
+        print(f"🔁 Resuming {len(resumed)} unfinished job(s)")
+
+    return resumed
@@ -0,0 +1,243 @@
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+
+# Characters a JSON string may escape (\uXXXX is not needed for our schemas)
+_ESCAPES = set('"\\/bfnrt')
+_WS = set(" \t\n\r")
+
+
+# ---------------------------------------------------
+# GRAMMAR: {"k1": ["..", ..], "k2": [..], ...}
+# ---------------------------------------------------
+
+class StringListObjectGrammar:
+    """
+    Character-level recognizer for a JSON object whose keys are fixed (in
+    order) and whose values are arrays of strings, i.e. the risk schema.
+
+    States are small tuples (mode, key index, position in key) so they can
+    be advanced speculatively for many candidate tokens.
+    """
+
+    START = ("start", 0, 0)
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    @classmethod
+    def from_schema(cls, schema: dict):
+        props = schema.get("properties", {})
+
+        for name, spec in props.items():
+            if spec.get("type") != "array" or spec.get("items", {}).get("type") != "string":
+                raise ValueError(f"Unsupported schema for '{name}': only arrays of strings")
+
+        return cls(schema.get("required") or list(props))
+
+    def step(self, state, ch):
+        """
+        Returns the state after consuming ch, or None if ch is not allowed.
+        """
+        mode, k, pos = state
+
+        if mode == "str":
+            if ch == '"':
+                return ("after_item", k, 0)
+            if ch == "\\":
+                return ("esc", k, 0)
+            if ord(ch) < 0x20:
+                return None
+            return state
+
+        if mode == "esc":
+            return ("str", k, 0) if ch in _ESCAPES else None
+
+        if mode == "key":
+            key = self.keys[k]
+            if pos < len(key):
+                return ("key", k, pos + 1) if ch == key[pos] else None
+            return ("colon", k, 0) if ch == '"' else None
+
+        if ch in _WS:
+            return state if mode != "done" else None
+
+        if mode == "start":
+            if ch != "{":
+                return None
+            return ("key_open", 0, 0) if self.keys else ("after_arr_last", 0, 0)
+
+        if mode == "key_open":
+            return ("key", k, 0) if ch == '"' else None
+
+        if mode == "colon":
+            return ("arr_open", k, 0) if ch == ":" else None
+
+        if mode == "arr_open":
+            return ("arr_first", k, 0) if ch == "[" else None
+
+        if mode == "arr_first":
+            if ch == '"':
+                return ("str", k, 0)
+            return self._close_array(k) if ch == "]" else None
+
+        if mode == "arr_next":
+            return ("str", k, 0) if ch == '"' else None
+
+        if mode == "after_item":
+            if ch == ",":
+                return ("arr_next", k, 0)
+            return self._close_array(k) if ch == "]" else None
+
+        if mode == "after_arr":
+            return ("key_open", k + 1, 0) if ch == "," else None
+
+        if mode == "after_arr_last":
+            return ("done", k, 0) if ch == "}" else None
+
+        return None
+
+    def _close_array(self, k):
+        return ("after_arr_last", k, 0) if k == len(self.keys) - 1 else ("after_arr", k, 0)
+
+    def feed(self, state, text):
+        for ch in text:
+            state = self.step(state, ch)
+            if state is None:
+                return None
+        return state
+
+    def is_complete(self, state) -> bool:
+        return state is not None and state[0] == "done"
+
+    def forced_char(self, state) -> str:
+        """
+        A character that is always valid next: used when none of the model's
+        top candidates fit, so decoding can still make progress.
+        """
+        mode, k, pos = state
+        if mode == "key":
+            key = self.keys[k]
+            return key[pos] if pos < len(key) else '"'
+        return {
+            "start": "{",
+            "key_open": '"',
+            "colon": ":",
+            "arr_open": "[",
+            "arr_first": "]",
+            "arr_next": '"',
+            "str": '"',
+            "esc": '"',
+            "after_item": "]",
+            "after_arr": ",",
+            "after_arr_last": "}",
+        }[mode]
+
+    def closing_suffix(self, state) -> str:
+        """
+        Shortest forced completion from state, used to close an object that
+        ran out of token budget so the output always parses.
+        """
+        suffix = ""
+        while not self.is_complete(state):
+            ch = self.forced_char(state)
+            suffix += ch
+            state = self.step(state, ch)
+        return suffix
+
+
+# ---------------------------------------------------
+# DECODING HOOKS
+# ---------------------------------------------------
+
+class JsonConstraint(LogitsProcessor):
+    """
+    Constrains generation (batch size 1) to the grammar and stops as soon
+    as the closing brace is emitted.
+
+    Each step only the model's top_k candidates plus single-character
+    fallbacks are checked against the grammar; everything else is masked.
+    """
+
+    def __init__(self, tokenizer, grammar, prompt_len: int, top_k: int = 32):
+        self.tokenizer = tokenizer
+        self.grammar = grammar
+        self.prompt_len = prompt_len
+        self.top_k = top_k
+
+        self.text = ""
+        self.state = grammar.START
+        self.synced = prompt_len
+        self.token_text = {}
+        self.char_token = {}
+
+    def _text_of(self, token_id: int) -> str:
+        if token_id not in self.token_text:
+            self.token_text[token_id] = self.tokenizer.decode([token_id])
+        return self.token_text[token_id]
+
+    def _char_token(self, ch: str) -> int:
+        if ch not in self.char_token:
+            self.char_token[ch] = self.tokenizer.encode(ch, add_special_tokens=False)[0]
+        return self.char_token[ch]
+
+    def _sync(self, input_ids):
+        """
+        Advance the grammar state over tokens generated since the last call.
+        """
+        if input_ids.shape[1] == self.synced:
+            return
+
+        text = self.tokenizer.decode(
+            input_ids[0, self.prompt_len:], skip_special_tokens=True
+        )
+
+        if text.startswith(self.text):
+            new_state = self.grammar.feed(self.state, text[len(self.text):])
+        else:
+            new_state = self.grammar.feed(self.grammar.START, text)
+
+        self.text = text
+        self.state = new_state or self.state
+        self.synced = input_ids.shape[1]
+
+    def __call__(self, input_ids, scores):
+        self._sync(input_ids)
+
+        top = torch.topk(scores[0], min(self.top_k, scores.shape[1])).indices.tolist()
+        allowed = [
+            t for t in top
+            if self._text_of(t)
+            and self.grammar.feed(self.state, self._text_of(t)) is not None
+        ]
+
+        if not allowed:
+            allowed = [self._char_token(self.grammar.forced_char(self.state))]
+
+        mask = torch.full_like(scores, float("-inf"))
+        mask[0, allowed] = 0
+        return scores + mask
+
+    def done(self, input_ids) -> bool:
+        self._sync(input_ids)
+        return self.grammar.is_complete(self.state)
+
+    def finish(self, input_ids) -> str:
+        """
+        Generated text, closed off if generation hit max_new_tokens first.
+        """
+        self._sync(input_ids)
+        return self.text.strip() + self.grammar.closing_suffix(self.state)
+
+
+class JsonStop(StoppingCriteria):
+    """
+    Ends generation once the constrained output is a complete object.
+    """
+
+    def __init__(self, constraint: JsonConstraint):
+        self.constraint = constraint
+
+    def __call__(self, input_ids, scores, **kwargs):
+        done = self.constraint.done(input_ids)
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool)
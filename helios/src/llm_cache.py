@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+
+DATA_DIR = Path("./data")
+DATA_DIR.mkdir(exist_ok=True)
+
+LLM_CACHE_PATH = DATA_DIR / "llm_cache.sqlite"
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Sampled outputs (temperature > 0) differ call to call, so they bypass the
+# cache unless this is set explicitly. Call sites whose repeats should hit
+# the cache decode greedily instead (see api.generate_recommendation).
+LLM_CACHE_SAMPLED = os.getenv("LLM_CACHE_SAMPLED", "0") == "1"
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_conn = None
+
+_stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+}
+
+
+# ---------------------------------------------------
+# STORAGE
+# ---------------------------------------------------
+
+def _get_conn():
+    global _conn
+
+    if _conn is None:
+        _conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        _conn.commit()
+
+    return _conn
+
+
+def _expired(created_at: float) -> bool:
+    return time.time() - created_at > LLM_CACHE_TTL
+
+
+def _remember(key: str, response: str, created_at: float):
+    # Kept with the disk row's timestamp so both tiers expire together
+    _memory[key] = (response, created_at)
+    _memory.move_to_end(key)
+
+    while len(_memory) > LLM_CACHE_MEMORY_ITEMS:
+        _memory.popitem(last=False)
+
+
+def _lookup(key: str):
+    if key in _memory:
+        response, created_at = _memory[key]
+
+        if not _expired(created_at):
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return response
+
+        del _memory[key]
+
+    row = _get_conn().execute(
+        "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    response, created_at = row
+
+    if _expired(created_at):
+        _get_conn().execute("DELETE FROM responses WHERE key = ?", (key,))
+        _get_conn().commit()
+        return None
+
+    _stats["disk_hits"] += 1
+    _remember(key, response, created_at)
+    return response
+
+
+def _store(key: str, response: str):
+    conn = _get_conn()
+    now = time.time()
+
+    conn.execute(
+        "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+        (key, response, now),
+    )
+
+    # Evict expired entries, then the oldest ones beyond the size cap
+    conn.execute("DELETE FROM responses WHERE created_at < ?", (now - LLM_CACHE_TTL,))
+    conn.execute(
+        """
+        DELETE FROM responses WHERE key IN (
+            SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (LLM_CACHE_MAX_ENTRIES,),
+    )
+    conn.commit()
+
+    _remember(key, response, now)
+
+
+# ---------------------------------------------------
+# PUBLIC API
+# ---------------------------------------------------
+
+def cache_key(provider, model, messages, temperature, max_tokens, **options) -> str:
+    # Options that change the output (e.g. json_schema) join the key when set
+    options = {k: v for k, v in options.items() if v is not None}
+    payload = json.dumps(
+        [provider, model, messages, temperature, max_tokens, options],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature) -> bool:
+    return LLM_CACHE_ENABLED and (temperature <= 0 or LLM_CACHE_SAMPLED)
+
+
+def cached_call(provider, model, messages, temperature, max_tokens, compute, **options):
+    """
+    Returns compute() for this request, serving repeats from the in-memory
+    LRU tier first and the on-disk tier second.
+    """
+    if not is_cacheable(temperature):
+        with _lock:
+            _stats["bypassed"] += 1
+        return compute()
+
+    key = cache_key(provider, model, messages, temperature, max_tokens, **options)
+
+    with _lock:
+        cached = _lookup(key)
+        if cached is not None:
+            return cached
+        _stats["misses"] += 1
+
+    response = compute()
+
+    with _lock:
+        _store(key, response)
+
+    return response
+
+
+def cached_stream(provider, model, messages, temperature, max_tokens, stream, **options):
+    """
+    Streaming counterpart of cached_call: a hit is yielded as one piece;
+    a miss yields stream()'s pieces as they come and stores the full text
+    once the stream completes.
+    """
+    if not is_cacheable(temperature):
+        with _lock:
+            _stats["bypassed"] += 1
+        yield from stream()
+        return
+
+    key = cache_key(provider, model, messages, temperature, max_tokens, **options)
+
+    with _lock:
+        cached = _lookup(key)
+        if cached is None:
+            _stats["misses"] += 1
+
+    if cached is not None:
+        yield cached
+        return
+
+    pieces = []
+    for piece in stream():
+        pieces.append(piece)
+        yield piece
+
+    # Non-streamed responses are stored stripped; match them
+    with _lock:
+        _store(key, "".join(pieces).strip())
+
+
+def cache_stats() -> dict:
+    with _lock:
+        return dict(_stats, memory_items=len(_memory))
@@ -1,22 +1,9 @@
-import json
-import requests
-from .config import OPENROUTER_API_KEY, BASE_URL, TRIPLET_MODEL
+from .config import TRIPLET_MODEL
+from .openrouter_client import chat_sync
 
 
 def call_openrouter(prompt: str) -> str:
-    payload = {
-        "model": TRIPLET_MODEL,
-        "messages": [{"role": "user", "content": prompt}]
-    }
-
-    res = requests.post(
-        BASE_URL,
-        headers={
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "Content-Type": "application/json"
-        },
-        data=json.dumps(payload)
+    return chat_sync(
+        [{"role": "user", "content": prompt}],
+        model=TRIPLET_MODEL,
     )
-
-    res.raise_for_status()
-    return res.json()["choices"][0]["message"]["content"]
@@ -1,7 +1,24 @@
 import os
+import copy
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
 import torch
-import requests
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import (
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    LogitsProcessorList,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
+
+from . import local_workers
+from .llm_cache import cached_call, cached_stream
+from .json_constraint import StringListObjectGrammar, JsonConstraint, JsonStop
+from .openrouter_client import chat_sync, stream_sync, json_response_format
 
 # =====================================================
 # CONFIG
@@ -10,45 +27,612 @@ from transformers import AutoTokenizer, AutoModelForCausalLM
 AI_PROVIDER = os.getenv("AI_PROVIDER", "local")  # "local" or "openrouter"
 
 # ---- OpenRouter config ----
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# (URL, key, rate limit and retries live in openrouter_client)
 OPENROUTER_MODEL = "tngtech/deepseek-r1t2-chimera:free"
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 # ---- Local model config ----
 MODEL_NAME = "Qwen/Qwen3-0.6B"
 
+# none | int8 (dynamic quantization of Linear layers) | bf16 (where the CPU supports it)
+LOCAL_QUANT = os.getenv("LOCAL_QUANT", "none")
+QUANT_MODES = ("none", "int8", "bf16")
+
+
+def _model_id(quant: str) -> str:
+    return MODEL_NAME if quant == "none" else f"{MODEL_NAME}:{quant}"
+
+
+# Identifies the weights in cache keys: quantized outputs differ from full
+# precision. Set to the mode that actually loaded by get_local_model(); read
+# it through local_model_id().
+MODEL_ID = _model_id(LOCAL_QUANT)
+
+# ---- Micro-batching config ----
+# Concurrent local chat() calls are gathered into one generate() call of up
+# to LOCAL_MAX_BATCH prompts, waiting at most LOCAL_BATCH_WAIT_MS for company.
+LOCAL_BATCHING = os.getenv("LOCAL_BATCHING", "1") == "1"
+LOCAL_MAX_BATCH = int(os.getenv("LOCAL_MAX_BATCH", "8"))
+LOCAL_BATCH_WAIT_MS = float(os.getenv("LOCAL_BATCH_WAIT_MS", "20"))
+
+# ---- Prefix KV cache config ----
+# Calls that pass prefix= reuse the KV cache of that constant prompt prefix
+# and only prefill the variable suffix; concurrent calls with the same
+# prefix are micro-batched on top of one copy of it.
+LOCAL_PREFIX_CACHE = os.getenv("LOCAL_PREFIX_CACHE", "1") == "1"
+LOCAL_PREFIX_CACHE_SIZE = int(os.getenv("LOCAL_PREFIX_CACHE_SIZE", "8"))
+
+# ---- Prompt-lookup decoding config ----
+# Default draft length for call sites that opt in (see prompt_lookup_tokens).
+# Off (0) by default; measure with `python bench.py prompt-lookup` first.
+PROMPT_LOOKUP_TOKENS = int(os.getenv("LOCAL_PROMPT_LOOKUP_TOKENS", "0"))
+
+
+def prompt_lookup_tokens(template: str) -> int:
+    """
+    Draft length for one call site's template:
+    LOCAL_PROMPT_LOOKUP_TOKENS_<TEMPLATE> when set, else PROMPT_LOOKUP_TOKENS.
+    """
+    return int(os.getenv(f"LOCAL_PROMPT_LOOKUP_TOKENS_{template}", PROMPT_LOOKUP_TOKENS))
+
 _tokenizer = None
 _model = None
+_load_lock = threading.Lock()
+
+_prefix_cache = OrderedDict()
+_prefix_lock = threading.Lock()
 
 
 # =====================================================
 # LOCAL MODEL LOADING
 # =====================================================
 
-def get_local_model():
-    global _tokenizer, _model
+def bf16_supported() -> bool:
+    try:
+        return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except Exception:
+        return False
+
+
+def model_memory_bytes(model) -> int:
+    """
+    Bytes held by the model's weights, counting packed int8 Linear params.
+    """
+    total = 0
+
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else [value]
+        for t in tensors:
+            if isinstance(t, torch.Tensor):
+                total += t.numel() * t.element_size()
 
-    if _tokenizer is None or _model is None:
-        print("🧠 Loading LOCAL LLM:", MODEL_NAME)
+    return total
 
-        _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
 
-        _model = AutoModelForCausalLM.from_pretrained(
-            MODEL_NAME,
-            device_map="cpu",
-            torch_dtype="auto",
+def effective_quant(quant: str) -> str:
+    """
+    The mode load_local_model() really uses for quant on this machine.
+    """
+    if quant not in QUANT_MODES:
+        raise ValueError(f"Unknown LOCAL_QUANT='{quant}'. Use one of {QUANT_MODES}.")
+
+    if quant == "bf16" and not bf16_supported():
+        print("⚠️ bf16 not supported on this CPU, loading full precision")
+        return "none"
+
+    return quant
+
+
+def load_local_model(quant: str = "none"):
+    """
+    Load tokenizer + model in the given precision mode (see QUANT_MODES).
+    """
+    quant = effective_quant(quant)
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+
+    # Left padding keeps every prompt flush against its generated tokens
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    dtype = {"none": "auto", "int8": torch.float32, "bf16": torch.bfloat16}[quant]
+
+    model = AutoModelForCausalLM.from_pretrained(
+        MODEL_NAME,
+        device_map="cpu",
+        torch_dtype=dtype,
+    )
+
+    if quant == "int8":
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    model.eval()
+    return tokenizer, model
+
+
+def check_risk_json(tokenizer, model) -> bool:
+    """
+    Startup check: does this model still answer RISK_PROMPT with parseable
+    JSON carrying every risk category?
+    """
+    from .risk_engine import RISK_PROMPT, RISK_CATEGORIES, _safe_json_parse
+
+    prompt = RISK_PROMPT.replace(
+        "{TEXT}", "I run a sneaker store. Theft and fire are big risks."
+    )
+    text = _render(tokenizer, [{"role": "user", "content": prompt}])
+    inputs = tokenizer([text], return_tensors="pt")
+
+    with torch.no_grad():
+        generated = model.generate(
+            **inputs,
+            max_new_tokens=300,
+            do_sample=False,
+            pad_token_id=tokenizer.pad_token_id,
         )
 
-        _model.eval()
+    raw = tokenizer.decode(
+        generated[0][inputs.input_ids.shape[1]:], skip_special_tokens=True
+    )
+
+    try:
+        parsed = _safe_json_parse(raw)
+    except Exception:
+        return False
+
+    return isinstance(parsed, dict) and all(k in parsed for k in RISK_CATEGORIES)
+
+
+def get_local_model():
+    global _tokenizer, _model, MODEL_ID
+
+    with _load_lock:
+        if _tokenizer is None or _model is None:
+            print("🧠 Loading LOCAL LLM:", MODEL_NAME, f"({LOCAL_QUANT})")
+
+            quant = effective_quant(LOCAL_QUANT)
+            _tokenizer, _model = load_local_model(quant)
+
+            if quant != "none" and not check_risk_json(_tokenizer, _model):
+                print("⚠️ Quantized model failed the RISK_PROMPT JSON check, "
+                      "falling back to full precision")
+                quant = "none"
+                _tokenizer, _model = load_local_model(quant)
+
+            MODEL_ID = _model_id(quant)
 
     return _tokenizer, _model
 
 
+def local_model_id() -> str:
+    """
+    MODEL_ID of the weights that serve local requests. A quantized mode may
+    fall back to full precision at load time, so it is only known once the
+    model (or, with LOCAL_WORKERS, a worker's model) has loaded.
+    """
+    if LOCAL_QUANT == "none":
+        return MODEL_ID
+
+    if local_workers.LOCAL_WORKERS > 0:
+        return local_workers.get_worker_pool().model_id()
+
+    get_local_model()
+    return MODEL_ID
+
+
+# =====================================================
+# BATCHED LOCAL GENERATION
+# =====================================================
+
+def _sampling_args(temperature):
+    # temperature <= 0 means greedy decoding (deterministic, cacheable)
+    if temperature > 0:
+        return {"do_sample": True, "temperature": temperature, "top_p": 0.9}
+    return {"do_sample": False}
+
+
+def _render(tokenizer, messages) -> str:
+    return tokenizer.apply_chat_template(
+        messages,
+        tokenize=False,
+        add_generation_prompt=True,
+        enable_thinking=False,
+    )
+
+
+def _prefixed_batch_inputs(tokenizer, texts, prefix):
+    """
+    generate() arguments for a batch of prompts that share the rendered
+    prefix, reusing its cached KV state for every row, or None when the
+    prompts do not all start with the same rendered prefix.
+
+    Suffixes are padded on the left, i.e. between the shared prefix and
+    the suffix: masked pad positions are skipped by the attention mask and
+    the position ids, so each row decodes as if it were alone.
+    """
+    cuts = [text.find(prefix) for text in texts]
+    if min(cuts) < 0:
+        return None
+
+    cuts = [cut + len(prefix) for cut in cuts]
+    heads = {text[:cut] for text, cut in zip(texts, cuts)}
+    suffixes = [
+        tokenizer(text[cut:], add_special_tokens=False).input_ids
+        for text, cut in zip(texts, cuts)
+    ]
+    if len(heads) != 1 or not all(suffixes):
+        return None
+
+    prefix_ids, kv = _get_prefix_kv(heads.pop())
+    rows = len(texts)
+    width = max(len(ids) for ids in suffixes)
+
+    suffix_ids = torch.tensor(
+        [[tokenizer.pad_token_id] * (width - len(ids)) + ids for ids in suffixes]
+    )
+    suffix_mask = torch.tensor(
+        [[0] * (width - len(ids)) + [1] * len(ids) for ids in suffixes]
+    )
+
+    past = copy.deepcopy(kv)
+    past.batch_repeat_interleave(rows)
+
+    return {
+        "input_ids": torch.cat([prefix_ids.expand(rows, -1), suffix_ids], dim=1),
+        "attention_mask": torch.cat(
+            [torch.ones(rows, prefix_ids.shape[1], dtype=suffix_mask.dtype), suffix_mask],
+            dim=1,
+        ),
+        "past_key_values": past,
+    }
+
+
+def chat_batch(list_of_messages, max_new_tokens=300, temperature=0.6, prefix=None):
+    """
+    Run several conversations through ONE model.generate call.
+    Prompts are left-padded; outputs are returned in input order.
+
+    prefix: constant leading text shared by every prompt; its KV state is
+    computed once (see _get_prefix_kv) and only the suffixes are prefilled.
+    """
+    tokenizer, model = get_local_model()
+
+    texts = [_render(tokenizer, messages) for messages in list_of_messages]
+
+    inputs = None
+    if prefix and LOCAL_PREFIX_CACHE:
+        inputs = _prefixed_batch_inputs(tokenizer, texts, prefix)
+    if inputs is None:
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+
+    with torch.no_grad():
+        generated = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            use_cache=True,
+            pad_token_id=tokenizer.pad_token_id,
+            **_sampling_args(temperature),
+        )
+
+    prompt_len = inputs["input_ids"].shape[1]
+
+    return [
+        tokenizer.decode(row[prompt_len:], skip_special_tokens=True).strip()
+        for row in generated
+    ]
+
+
+class _MicroBatcher:
+    """
+    Collects concurrent chat() requests into micro-batches.
+
+    A single worker thread takes the first waiting request, keeps gathering
+    until the batch is full or the max-wait deadline passes, then runs one
+    chat_batch per group of identical generation settings and prefix.
+    """
+
+    def __init__(self, max_batch: int, max_wait_ms: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def submit(self, messages, max_new_tokens, temperature, prefix=None) -> Future:
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(
+                    target=self._run, daemon=True, name="local-llm-batcher"
+                )
+                self.worker.start()
+
+        future = Future()
+        self.requests.put((messages, max_new_tokens, temperature, prefix, future))
+        return future
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for req in self._collect():
+                groups.setdefault(req[1:4], []).append(req)
+
+            for (max_new_tokens, temperature, prefix), reqs in groups.items():
+                try:
+                    outputs = chat_batch(
+                        [r[0] for r in reqs],
+                        max_new_tokens=max_new_tokens,
+                        temperature=temperature,
+                        prefix=prefix,
+                    )
+                except Exception as e:
+                    for r in reqs:
+                        r[4].set_exception(e)
+                    continue
+
+                for r, out in zip(reqs, outputs):
+                    r[4].set_result(out)
+
+
+_batcher = _MicroBatcher(LOCAL_MAX_BATCH, LOCAL_BATCH_WAIT_MS)
+
+
+# =====================================================
+# SHARED-PREFIX KV CACHE
+# =====================================================
+
+def _get_prefix_kv(prefix_text: str):
+    """
+    Returns (prefix token ids, KV cache) for a rendered prompt prefix,
+    computing it once and keeping the most recently used ones.
+    """
+    with _prefix_lock:
+        if prefix_text in _prefix_cache:
+            _prefix_cache.move_to_end(prefix_text)
+            return _prefix_cache[prefix_text]
+
+    tokenizer, model = get_local_model()
+    prefix_ids = tokenizer(prefix_text, return_tensors="pt").input_ids
+
+    with torch.no_grad():
+        kv = model(input_ids=prefix_ids, use_cache=True).past_key_values
+
+    with _prefix_lock:
+        _prefix_cache[prefix_text] = (prefix_ids, kv)
+        while len(_prefix_cache) > LOCAL_PREFIX_CACHE_SIZE:
+            _prefix_cache.popitem(last=False)
+
+    return prefix_ids, kv
+
+
+def _prepare_single(messages, prefix=None, prompt_lookup=None, json_schema=None):
+    """
+    Input ids and extra generate() arguments for one prompt.
+
+    prefix: if the prompt contains it, its cached KV state is reused and
+    only the tokens after it are prefilled.
+    prompt_lookup: number of draft tokens for n-gram prompt-lookup decoding;
+    drafts are copied from matching spans of the prompt and verified in a
+    single forward pass. Assisted decoding crops and regrows the KV cache
+    itself, so it does not start from a shared prefix cache; when both are
+    requested, prompt lookup wins.
+    json_schema: constrain decoding to the schema (objects of string arrays)
+    and stop as soon as the closing brace is emitted.
+    """
+    tokenizer, model = get_local_model()
+
+    text = _render(tokenizer, messages)
+    use_prefix = prefix and LOCAL_PREFIX_CACHE and not prompt_lookup
+    cut = text.find(prefix) if use_prefix else -1
+    extra = {}
+
+    if cut >= 0:
+        cut += len(prefix)
+        prefix_ids, kv = _get_prefix_kv(text[:cut])
+
+        # Tokenize the suffix on its own so the ids always extend the cached
+        # prefix exactly, even where BPE would merge across the boundary.
+        suffix_ids = tokenizer(
+            text[cut:], return_tensors="pt", add_special_tokens=False
+        ).input_ids
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+
+        if suffix_ids.shape[1] > 0:
+            extra["past_key_values"] = copy.deepcopy(kv)
+    else:
+        input_ids = tokenizer(text, return_tensors="pt").input_ids
+
+    if prompt_lookup:
+        extra["prompt_lookup_num_tokens"] = prompt_lookup
+
+    constraint = None
+    if json_schema:
+        constraint = JsonConstraint(
+            tokenizer,
+            StringListObjectGrammar.from_schema(json_schema),
+            prompt_len=input_ids.shape[1],
+        )
+        extra["logits_processor"] = LogitsProcessorList([constraint])
+        extra["stopping_criteria"] = StoppingCriteriaList([JsonStop(constraint)])
+
+    return tokenizer, model, input_ids, extra, constraint
+
+
+def _generate_single(model, tokenizer, input_ids, max_new_tokens, temperature, extra):
+    with torch.no_grad():
+        return model.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            max_new_tokens=max_new_tokens,
+            use_cache=True,
+            pad_token_id=tokenizer.pad_token_id,
+            **_sampling_args(temperature),
+            **extra,
+        )
+
+
+def _chat_single(
+    messages,
+    max_new_tokens,
+    temperature,
+    prefix=None,
+    prompt_lookup=None,
+    json_schema=None,
+):
+    """
+    Generate for one prompt outside the micro-batcher (see _prepare_single
+    for the options).
+    """
+    tokenizer, model, input_ids, extra, constraint = _prepare_single(
+        messages, prefix, prompt_lookup, json_schema
+    )
+    generated = _generate_single(
+        model, tokenizer, input_ids, max_new_tokens, temperature, extra
+    )
+
+    if constraint:
+        return constraint.finish(generated)
+
+    return tokenizer.decode(
+        generated[0][input_ids.shape[1]:], skip_special_tokens=True
+    ).strip()
+
+
+def _stream_single(messages, max_new_tokens, temperature, prefix=None, prompt_lookup=None):
+    """
+    Like _chat_single, but yields decoded text pieces as they are generated;
+    generate() runs on a helper thread feeding a TextIteratorStreamer.
+    """
+    tokenizer, model, input_ids, extra, _ = _prepare_single(
+        messages, prefix, prompt_lookup
+    )
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True
+    )
+    errors = []
+
+    def run():
+        try:
+            _generate_single(
+                model, tokenizer, input_ids, max_new_tokens, temperature,
+                dict(extra, streamer=streamer),
+            )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    thread = threading.Thread(target=run, daemon=True, name="local-llm-stream")
+    thread.start()
+
+    for piece in streamer:
+        if piece:
+            yield piece
+
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+
+def _openrouter_chat(messages, max_new_tokens, temperature, json_schema=None):
+    print("🌐 Using OPENROUTER model:", OPENROUTER_MODEL)
+
+    params = {}
+    if json_schema:
+        params["response_format"] = json_response_format(json_schema)
+
+    return chat_sync(
+        messages,
+        model=OPENROUTER_MODEL,
+        temperature=temperature,
+        max_tokens=max_new_tokens,
+        **params,
+    )
+
+
+def _local_chat(
+    messages,
+    max_new_tokens,
+    temperature,
+    prefix=None,
+    prompt_lookup=None,
+    json_schema=None,
+):
+    print("🖥️ Using LOCAL LLM")
+
+    # With LOCAL_WORKERS > 0 the request runs in the least-loaded worker process
+    if local_workers.LOCAL_WORKERS > 0:
+        return local_workers.get_worker_pool().submit(
+            messages, max_new_tokens, temperature, prefix, prompt_lookup, json_schema
+        ).result(timeout=local_workers.LOCAL_WORKER_TIMEOUT)
+
+    # Prompt-lookup and constrained prompts run on their own: assisted and
+    # constrained decoding work on batch size 1. Prefixed prompts are
+    # batched with others sharing the prefix, on top of its cached KV.
+    if prompt_lookup or json_schema:
+        return _chat_single(
+            messages, max_new_tokens, temperature, prefix, prompt_lookup, json_schema
+        )
+
+    if LOCAL_BATCHING:
+        return _batcher.submit(messages, max_new_tokens, temperature, prefix).result()
+
+    return chat_batch([messages], max_new_tokens, temperature, prefix)[0]
+
+
+def _openrouter_stream(messages, max_new_tokens, temperature):
+    print("🌐 Streaming from OPENROUTER model:", OPENROUTER_MODEL)
+
+    return stream_sync(
+        messages,
+        model=OPENROUTER_MODEL,
+        temperature=temperature,
+        max_tokens=max_new_tokens,
+    )
+
+
+def _local_stream(messages, max_new_tokens, temperature, prefix=None, prompt_lookup=None):
+    print("🖥️ Streaming from LOCAL LLM")
+
+    if local_workers.LOCAL_WORKERS > 0:
+        return local_workers.get_worker_pool().submit_stream(
+            messages, max_new_tokens, temperature, prefix, prompt_lookup
+        )
+
+    return _stream_single(messages, max_new_tokens, temperature, prefix, prompt_lookup)
+
+
 # =====================================================
 # UNIFIED CHAT FUNCTION (SINGLE ENTRY POINT)
 # =====================================================
 
-def chat(messages, max_new_tokens=300, temperature=0.6):
+def chat(
+    messages,
+    max_new_tokens=300,
+    temperature=0.6,
+    prefix=None,
+    prompt_lookup=None,
+    json_schema=None,
+):
     """
     SINGLE LLM ENTRY POINT FOR ENTIRE BACKEND
 
@@ -58,76 +642,80 @@ def chat(messages, max_new_tokens=300, temperature=0.6):
 
     Controlled ONLY by env var:
         AI_PROVIDER = local | openrouter
+
+    Deterministic calls are served from the LLM response cache.
+
+    prefix: optional constant leading text of the prompt (a template's
+    fixed instructions). The local backend caches its KV state once and
+    only prefills the rest; OpenRouter ignores it.
+
+    prompt_lookup: opt-in n-gram assisted decoding for outputs that copy
+    spans of the prompt (grounded explanations). Number of draft tokens,
+    usually prompt_lookup_tokens(<template>); local backend only.
+
+    json_schema: structured output. Locally, decoding is constrained to the
+    schema and stops at the closing brace; OpenRouter gets a JSON-schema
+    response_format.
     """
 
     # -------------------------------------------------
     # OPENROUTER MODE
     # -------------------------------------------------
     if AI_PROVIDER == "openrouter":
-        if not OPENROUTER_API_KEY:
-            raise RuntimeError("OPENROUTER_API_KEY not set")
-
-        print("🌐 Using OPENROUTER model:", OPENROUTER_MODEL)
-
-        headers = {
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "http://localhost",
-            "X-Title": "Insurance AI Engine",
-        }
-
-        payload = {
-            "model": OPENROUTER_MODEL,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_new_tokens,
-        }
-
-        resp = requests.post(
-            OPENROUTER_URL,
-            headers=headers,
-            json=payload,
-            timeout=60,
+        return cached_call(
+            "openrouter", OPENROUTER_MODEL, messages, temperature, max_new_tokens,
+            lambda: _openrouter_chat(messages, max_new_tokens, temperature, json_schema),
+            json_schema=json_schema,
         )
 
-        resp.raise_for_status()
-
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
-
     # -------------------------------------------------
     # LOCAL MODEL MODE (DEFAULT)
     # -------------------------------------------------
     elif AI_PROVIDER == "local":
-        print("🖥️ Using LOCAL LLM")
-
-        tokenizer, model = get_local_model()
+        return cached_call(
+            "local", local_model_id(), messages, temperature, max_new_tokens,
+            lambda: _local_chat(
+                messages, max_new_tokens, temperature, prefix, prompt_lookup, json_schema
+            ),
+            json_schema=json_schema,
+        )
 
-        text = tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True,
-            enable_thinking=False,
+    # -------------------------------------------------
+    # INVALID CONFIG
+    # -------------------------------------------------
+    else:
+        raise RuntimeError(
+            f"Invalid AI_PROVIDER='{AI_PROVIDER}'. "
+            "Use 'local' or 'openrouter'."
         )
 
-        inputs = tokenizer([text], return_tensors="pt")
 
-        with torch.no_grad():
-            generated = model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                do_sample=True,
-                temperature=temperature,
-                top_p=0.9,
-                use_cache=True,
-            )
+def chat_stream(
+    messages,
+    max_new_tokens=300,
+    temperature=0.6,
+    prefix=None,
+    prompt_lookup=None,
+):
+    """
+    Streaming variant of chat(): yields text pieces as they are generated.
+    Same provider switch and options (no json_schema); a cached response
+    comes back as a single piece.
+    """
+    if AI_PROVIDER == "openrouter":
+        return cached_stream(
+            "openrouter", OPENROUTER_MODEL, messages, temperature, max_new_tokens,
+            lambda: _openrouter_stream(messages, max_new_tokens, temperature),
+        )
 
-        output_ids = generated[0][len(inputs.input_ids[0]):]
-        return tokenizer.decode(output_ids, skip_special_tokens=True).strip()
+    elif AI_PROVIDER == "local":
+        return cached_stream(
+            "local", local_model_id(), messages, temperature, max_new_tokens,
+            lambda: _local_stream(
+                messages, max_new_tokens, temperature, prefix, prompt_lookup
+            ),
+        )
 
-    # -------------------------------------------------
-    # INVALID CONFIG
-    # -------------------------------------------------
     else:
         raise RuntimeError(
             f"Invalid AI_PROVIDER='{AI_PROVIDER}'. "
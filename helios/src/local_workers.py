@@ -0,0 +1,259 @@
+import os
+import time
+import queue
+import atexit
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# Number of inference worker processes for the local backend (0 = run in
+# the API process), and torch intra-op threads per worker.
+LOCAL_WORKERS = int(os.getenv("LOCAL_WORKERS", "0"))
+LOCAL_WORKER_THREADS = int(os.getenv("LOCAL_WORKER_THREADS", "0"))
+
+# Seconds a caller waits for a worker's answer (or its next streamed piece)
+LOCAL_WORKER_TIMEOUT = float(os.getenv("LOCAL_WORKER_TIMEOUT", "300"))
+
+_STOP = None
+
+
+# ---------------------------------------------------
+# WORKER PROCESS
+# ---------------------------------------------------
+
+def _worker_main(index, threads, cores, requests, results):
+    """
+    Pin to a fixed core set and thread count, load a private model copy
+    (safetensors weights are mmap'd, so file pages are shared through the
+    page cache), then serve requests until told to stop.
+    """
+    # Never dispatch back to a pool from inside a worker
+    global LOCAL_WORKERS
+    LOCAL_WORKERS = 0
+
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    from . import local_llm
+    local_llm.get_local_model()
+    results.put((None, "ready", local_llm.MODEL_ID))
+    print(f"🧵 Local worker {index} ready: {threads} threads on cores {sorted(cores)}")
+
+    # A few request threads per worker so its micro-batcher can group them
+    pool = ThreadPoolExecutor(max_workers=local_llm.LOCAL_MAX_BATCH)
+
+    def serve(req_id, args, stream):
+        try:
+            if stream:
+                for piece in local_llm._local_stream(*args):
+                    results.put((req_id, "piece", piece))
+                results.put((req_id, "end", None))
+            else:
+                results.put((req_id, "result", local_llm._local_chat(*args)))
+        except Exception as e:
+            results.put((req_id, "error", f"{type(e).__name__}: {e}"))
+
+    while True:
+        item = requests.get()
+        if item is _STOP:
+            break
+        pool.submit(serve, *item)
+
+    pool.shutdown(wait=True)
+
+
+# ---------------------------------------------------
+# DISPATCHER
+# ---------------------------------------------------
+
+def _available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _core_sets(workers: int, threads: int):
+    cores = _available_cores()
+
+    return [
+        {cores[(i * threads + j) % len(cores)] for j in range(threads)}
+        for i in range(workers)
+    ]
+
+
+class LocalWorkerPool:
+    """
+    Fixed pool of inference processes; each request goes to the worker with
+    the fewest requests in flight.
+
+    A monitor thread watches the process sentinels: when a worker dies
+    (e.g. OOM-killed) its pending requests fail and it is respawned.
+    """
+
+    def __init__(self, workers: int, threads: int = 0):
+        self.ctx = mp.get_context("spawn")
+        self.threads = threads or max(1, len(_available_cores()) // workers)
+        self.cores = _core_sets(workers, self.threads)
+
+        self.results = self.ctx.Queue()
+        self.queues = [self.ctx.Queue() for _ in range(workers)]
+        self.procs = [None] * workers
+        self.in_flight = [0] * workers
+        self.pending = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.closing = False
+        self.loaded_id = None
+        self.ready = threading.Event()
+
+        for i in range(workers):
+            self._spawn(i)
+
+        threading.Thread(target=self._collect, daemon=True).start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def _spawn(self, i: int):
+        """
+        Start worker i on its current request queue.
+        """
+        p = self.ctx.Process(
+            target=_worker_main,
+            args=(i, self.threads, self.cores[i], self.queues[i], self.results),
+            daemon=True,
+            name=f"local-llm-worker-{i}",
+        )
+        p.start()
+        self.procs[i] = p
+
+    def _dispatch(self, args, sink, stream: bool):
+        with self.lock:
+            worker = min(range(len(self.queues)), key=self.in_flight.__getitem__)
+            req_id = next(self.ids)
+            self.in_flight[worker] += 1
+            self.pending[req_id] = (worker, sink)
+            requests = self.queues[worker]
+
+        requests.put((req_id, args, stream))
+
+    def submit(self, *args) -> Future:
+        future = Future()
+        self._dispatch(args, future, stream=False)
+        return future
+
+    def submit_stream(self, *args):
+        """
+        Generator of the text pieces a worker streams back for this request.
+        """
+        pieces = queue.Queue()
+        self._dispatch(args, pieces, stream=True)
+
+        while True:
+            try:
+                kind, payload = pieces.get(timeout=LOCAL_WORKER_TIMEOUT)
+            except queue.Empty:
+                raise TimeoutError(f"No output from local worker in {LOCAL_WORKER_TIMEOUT}s")
+            if kind == "end":
+                return
+            if kind == "error":
+                raise RuntimeError(f"Local worker failed: {payload}")
+            yield payload
+
+    def model_id(self) -> str:
+        """
+        MODEL_ID the workers actually loaded (they all load the same mode),
+        waiting for the first one to be ready.
+        """
+        if not self.ready.wait(LOCAL_WORKER_TIMEOUT):
+            raise TimeoutError(f"No local worker ready in {LOCAL_WORKER_TIMEOUT}s")
+        return self.loaded_id
+
+    def _collect(self):
+        while True:
+            req_id, kind, payload = self.results.get()
+
+            if kind == "ready":
+                self.loaded_id = payload
+                self.ready.set()
+                continue
+
+            with self.lock:
+                # Requests of a dead worker were already failed by _monitor
+                if req_id not in self.pending:
+                    continue
+                if kind == "piece":
+                    worker, sink = self.pending[req_id]
+                else:
+                    worker, sink = self.pending.pop(req_id)
+                    self.in_flight[worker] -= 1
+
+            self._deliver(sink, kind, payload)
+
+    def _deliver(self, sink, kind, payload):
+        if isinstance(sink, queue.Queue):
+            sink.put((kind, payload))
+        elif kind == "error":
+            sink.set_exception(RuntimeError(f"Local worker failed: {payload}"))
+        else:
+            sink.set_result(payload)
+
+    def _monitor(self):
+        while not self.closing:
+            with self.lock:
+                procs = {p.sentinel: i for i, p in enumerate(self.procs)}
+
+            for sentinel in wait(list(procs), timeout=1.0):
+                if self.closing:
+                    return
+
+                i = procs[sentinel]
+                self.procs[i].join(timeout=1.0)
+                exitcode = self.procs[i].exitcode
+
+                with self.lock:
+                    lost = [
+                        (req_id, sink) for req_id, (worker, sink) in self.pending.items()
+                        if worker == i
+                    ]
+                    for req_id, _ in lost:
+                        del self.pending[req_id]
+                    # Requests dispatched from here on wait on a fresh queue
+                    # that the respawned worker serves
+                    self.queues[i] = self.ctx.Queue()
+                    self.in_flight[i] = 0
+
+                print(f"💥 Local worker {i} died (exit code {exitcode}), "
+                      f"failing {len(lost)} request(s) and respawning")
+
+                for _, sink in lost:
+                    self._deliver(sink, "error", f"worker {i} died (exit code {exitcode})")
+
+                # Keep a worker that dies on startup from respawning in a tight loop
+                time.sleep(1.0)
+                self._spawn(i)
+
+    def close(self):
+        self.closing = True
+        for q in self.queues:
+            q.put(_STOP)
+        for p in self.procs:
+            p.join(timeout=5)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> LocalWorkerPool:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = LocalWorkerPool(LOCAL_WORKERS, LOCAL_WORKER_THREADS)
+            atexit.register(_pool.close)
+        return _pool
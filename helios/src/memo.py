@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SingleFlightLRU:
+    """
+    In-memory LRU memo where concurrent callers asking for the same missing
+    key share one computation instead of each running it.
+
+    Failures are not cached: every waiter sees the exception and the next
+    caller computes again.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "joined": 0}
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._items[key]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["joined"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            if self.maxsize > 0:
+                self._items[key] = value
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, items=len(self._items))
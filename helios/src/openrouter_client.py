@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+
+# URL is overridable so the client can be pointed at a local stand-in server.
+OPENROUTER_URL = os.getenv(
+    "OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions"
+)
+OPENROUTER_RPM = float(os.getenv("OPENROUTER_RPM", "20"))
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "5"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "60"))
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20"))
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# ---------------------------------------------------
+# RATE LIMITING
+# ---------------------------------------------------
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate,
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after(resp) -> float | None:
+    """
+    Seconds to wait according to a Retry-After header (delta or HTTP date).
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+# ---------------------------------------------------
+# CLIENT
+# ---------------------------------------------------
+
+class OpenRouterClient:
+    """
+    One pooled, keep-alive HTTP client shared by every OpenRouter caller.
+    """
+
+    def __init__(
+        self,
+        url: str = OPENROUTER_URL,
+        api_key: str | None = None,
+        rpm: float = OPENROUTER_RPM,
+        max_retries: int = OPENROUTER_MAX_RETRIES,
+        timeout: float = OPENROUTER_TIMEOUT,
+    ):
+        self.url = url
+        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate=rpm / 60.0, capacity=max(1.0, rpm / 6.0))
+        self._http = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=OPENROUTER_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENROUTER_MAX_CONNECTIONS,
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "HTTP-Referer": "http://localhost",
+                    "X-Title": "Insurance AI Engine",
+                },
+            )
+        return self._http
+
+    async def complete(self, payload: dict) -> dict:
+        """
+        POST a chat completion, retrying 429/5xx and transport errors with
+        jittered exponential backoff (or the server's Retry-After).
+        """
+        if not self.api_key:
+            raise RuntimeError("OPENROUTER_API_KEY not set")
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+
+            try:
+                resp = await self._client().post(self.url, json=payload)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            if resp.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = _retry_after(resp)
+                await asyncio.sleep(delay if delay is not None else _backoff(attempt))
+                continue
+
+            resp.raise_for_status()
+            return resp.json()
+
+    async def achat(self, messages, model: str, **params) -> str:
+        payload = {"model": model, "messages": messages, **params}
+        data = await self.complete(payload)
+        return data["choices"][0]["message"]["content"].strip()
+
+    async def astream(self, messages, model: str, **params):
+        """
+        Yields content deltas of a streamed (SSE) completion. Failures are
+        retried like complete() until the first piece has been yielded.
+        """
+        if not self.api_key:
+            raise RuntimeError("OPENROUTER_API_KEY not set")
+
+        payload = {"model": model, "messages": messages, "stream": True, **params}
+        started = False
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            delay = None
+
+            try:
+                async with self._client().stream("POST", self.url, json=payload) as resp:
+                    if resp.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                        delay = _retry_after(resp)
+                        if delay is None:
+                            delay = _backoff(attempt)
+                    else:
+                        if resp.is_error:
+                            await resp.aread()
+                            resp.raise_for_status()
+
+                        async for line in resp.aiter_lines():
+                            # Skip blank separators and ": keep-alive" comments
+                            if not line.startswith("data:"):
+                                continue
+
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                return
+
+                            choices = json.loads(data).get("choices") or [{}]
+                            piece = choices[0].get("delta", {}).get("content")
+                            if piece:
+                                started = True
+                                yield piece
+                        return
+            except httpx.TransportError:
+                if started or attempt == self.max_retries:
+                    raise
+                delay = _backoff(attempt)
+
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# ---------------------------------------------------
+# SHARED INSTANCE + SYNC BRIDGE
+# ---------------------------------------------------
+
+_client = None
+_loop = None
+_lock = threading.Lock()
+
+
+def get_client() -> OpenRouterClient:
+    global _client
+
+    with _lock:
+        if _client is None:
+            _client = OpenRouterClient()
+        return _client
+
+
+def _get_loop():
+    """
+    Background event loop that owns the shared client, so synchronous
+    callers on any thread reuse the same connection pool.
+    """
+    global _loop
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, daemon=True, name="openrouter-loop"
+            ).start()
+        return _loop
+
+
+def run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+def json_response_format(schema: dict) -> dict:
+    """
+    OpenAI-style structured output request, as accepted by OpenRouter.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "response", "strict": True, "schema": schema},
+    }
+
+
+def chat_sync(messages, model: str, **params) -> str:
+    return run_sync(get_client().achat(messages, model, **params))
+
+
+def stream_sync(messages, model: str, **params):
+    """
+    Generator of streamed content pieces for synchronous callers; the
+    request runs on the client's loop and pieces are handed over a queue.
+    """
+    pieces = queue.Queue()
+
+    async def pump():
+        try:
+            async for piece in get_client().astream(messages, model, **params):
+                pieces.put((piece, None))
+            pieces.put((None, None))
+        except Exception as e:
+            pieces.put((None, e))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+
+    try:
+        while True:
+            piece, error = pieces.get()
+            if error is not None:
+                raise error
+            if piece is None:
+                return
+            yield piece
+    finally:
+        # Consumer went away early (e.g. client disconnected): stop the request
+        future.cancel()
+
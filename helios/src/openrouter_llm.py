@@ -1,5 +1,7 @@
 import os
-import requests
+
+from .llm_cache import cached_call, cached_stream
+from .openrouter_client import chat_sync, stream_sync, json_response_format
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
@@ -8,26 +10,55 @@ if not OPENROUTER_API_KEY:
 
 OPENROUTER_MODEL = "tngtech/deepseek-r1t2-chimera:free"
 
-API_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+def chat(
+    messages,
+    temperature=0.4,
+    max_tokens=500,
+    max_new_tokens=None,
+    prefix=None,
+    prompt_lookup=None,
+    json_schema=None,
+) -> str:
+    # Accept the local backend's keywords too, so ai_client.chat callers work
+    # regardless of provider. `prefix` and `prompt_lookup` are local-only.
+    if max_new_tokens is not None:
+        max_tokens = max_new_tokens
+
+    params = {}
+    if json_schema:
+        params["response_format"] = json_response_format(json_schema)
 
-def chat(messages, temperature=0.4, max_tokens=500) -> str:
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost",
-        "X-Title": "Insurance AI Engine",
-    }
+    return cached_call(
+        "openrouter", OPENROUTER_MODEL, messages, temperature, max_tokens,
+        lambda: chat_sync(
+            messages,
+            model=OPENROUTER_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **params,
+        ),
+        json_schema=json_schema,
+    )
 
-    payload = {
-        "model": OPENROUTER_MODEL,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-    }
 
-    resp = requests.post(API_URL, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
+def chat_stream(
+    messages,
+    temperature=0.4,
+    max_tokens=500,
+    max_new_tokens=None,
+    prefix=None,
+    prompt_lookup=None,
+):
+    if max_new_tokens is not None:
+        max_tokens = max_new_tokens
 
-    data = resp.json()
-    return data["choices"][0]["message"]["content"].strip()
+    return cached_stream(
+        "openrouter", OPENROUTER_MODEL, messages, temperature, max_tokens,
+        lambda: stream_sync(
+            messages,
+            model=OPENROUTER_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        ),
+    )
@@ -1,7 +1,21 @@
 import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from collections import deque
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
 import pdfplumber
 from .config import PDF_DIR
 
+# Sidecar cache of extracted page text: data/page_text/<file hash>/<page>.txt
+PAGE_CACHE_DIR = Path("./data") / "page_text"
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
 
 def get_pdf_files():
     return [
@@ -11,11 +25,152 @@ def get_pdf_files():
     ]
 
 
-def extract_text(path: str) -> str:
-    text = ""
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------
+# PAGE TEXT CACHE
+# ---------------------------------------------------
+
+def _write_atomic(path: Path, text: str):
+    """
+    Write through a temp file in the same directory and rename it into
+    place, so a crash or a concurrent reader never sees a partial file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _page_count(path: str, digest: str) -> int:
+    meta = PAGE_CACHE_DIR / digest / "meta.json"
+
+    if meta.exists():
+        with open(meta) as f:
+            return json.load(f)["pages"]
+
+    with pdfplumber.open(path) as pdf:
+        count = len(pdf.pages)
+
+    meta.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(meta, json.dumps({"pages": count}))
+
+    return count
+
+
+def _page_path(digest: str, page_no: int) -> Path:
+    return PAGE_CACHE_DIR / digest / f"{page_no:05d}.txt"
+
+
+# ---------------------------------------------------
+# PARALLEL EXTRACTION
+# ---------------------------------------------------
+
+def pdf_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for page extraction. Workers are spawned, not forked: the
+    parent runs threads (ingest stages, LLM clients) whose locks a fork
+    would copy in whatever state they happen to be.
+    """
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=get_context("spawn"))
+
+
+def _extract_range(path: str, start: int, stop: int):
+    """
+    Worker: run pdfplumber layout analysis on pages [start, stop).
+    """
     with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text()
-            if t:
-                text += t + "\n"
-    return text
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _missing_ranges(cached):
+    """
+    Group uncached page numbers into contiguous ranges of PAGES_PER_TASK.
+    """
+    ranges = []
+    start = None
+
+    for i in range(len(cached) + 1):
+        missing = i < len(cached) and not cached[i]
+
+        if missing and start is None:
+            start = i
+        elif start is not None and (not missing or i - start == PAGES_PER_TASK):
+            ranges.append((start, i))
+            start = i if missing else None
+
+    return ranges
+
+
+def iter_documents(paths, pool=None):
+    """
+    Yield (path, pages) for each file in order, where pages yields that
+    file's page texts in order; consume it before moving to the next file.
+
+    Cached pages are read from disk. The rest are extracted in ranges on a
+    process pool, a bounded window ahead of the consumer that runs across
+    file boundaries, so a library of small PDFs keeps every worker busy.
+    """
+    if pool is None:
+        with pdf_pool() as pool:
+            yield from iter_documents(paths, pool)
+        return
+
+    paths = list(paths)
+    docs = {}
+
+    def doc(k):
+        # (hash, page count) of paths[k], computed once by whoever needs it first
+        if k not in docs:
+            digest = file_hash(paths[k])
+            docs[k] = (digest, _page_count(paths[k], digest))
+        return docs[k]
+
+    def missing():
+        for k in range(len(paths)):
+            digest, count = doc(k)
+            for r in _missing_ranges([_page_path(digest, i).exists() for i in range(count)]):
+                yield k, r
+
+    ranges = missing()
+    pending = deque()
+
+    def fill():
+        while len(pending) < PDF_WORKERS * 2:
+            task = next(ranges, None)
+            if task is None:
+                break
+            k, (start, stop) = task
+            pending.append((k, start, pool.submit(_extract_range, paths[k], start, stop)))
+
+    def pages(k):
+        digest, count = doc(k)
+        i = 0
+
+        while i < count:
+            if pending and pending[0][:2] == (k, i):
+                _, _, future = pending.popleft()
+                fill()
+
+                for text in future.result():
+                    _write_atomic(_page_path(digest, i), text)
+                    yield text
+                    i += 1
+            else:
+                yield _page_path(digest, i).read_text(encoding="utf-8")
+                i += 1
+
+    fill()
+
+    for k, path in enumerate(paths):
+        yield path, pages(k)
@@ -3,9 +3,12 @@ import json
 import pickle
 from pathlib import Path
 
-from .pdf_reader import get_pdf_files, extract_text
-from .triplets import generate_triplets, parse_triplets
-from .graph_builder import build_graph
+from .config import PDF_DIR
+from .pdf_reader import get_pdf_files, file_hash
+from .ingest import ingest_into_graph
+from .graph_builder import build_graph, remove_source
+from .graph_store import CompactGraph, save_compact_graph, load_compact_graph, store_lock
+from .graph_index import get_graph_index, graph_version, bump_version
 
 from .policy_summary import summarize_policy, explain_policy
 from .risk_engine import policy_precheck, explain_risk_profile
@@ -22,7 +25,52 @@ DATA_DIR = Path("./data")
 DATA_DIR.mkdir(exist_ok=True)
 
 TRIPLETS_PATH = DATA_DIR / "triplets.json"
+GRAPH_STORE_DIR = DATA_DIR / "graph_store"
+
+# Pickled DiGraph written by older versions; migrated on first load
 GRAPH_PATH = DATA_DIR / "graph.pkl"
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+
+
+# ---------------------------------------------------
+# PERSISTENCE HELPERS
+# ---------------------------------------------------
+
+def _load_json(path: Path, default):
+    if not path.exists():
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_json(path: Path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _save_graph(G):
+    # Triplets are saved for debug / reuse, grouped by source document
+    triplets = {}
+    for u, v, data in G.edges(data=True):
+        triplets.setdefault(data.get("source"), []).append(
+            (u, data.get("relation"), v)
+        )
+
+    _save_json(TRIPLETS_PATH, triplets)
+    print(f"Saved triplets to {TRIPLETS_PATH}")
+
+    save_compact_graph(G, GRAPH_STORE_DIR)
+    print(f"Saved graph to {GRAPH_STORE_DIR}")
+
+
+def _scan_pdfs():
+    """
+    Returns {file name: content hash} for every PDF currently on disk.
+    """
+    return {
+        os.path.basename(pdf): file_hash(pdf)
+        for pdf in get_pdf_files()
+    }
 
 
 # ---------------------------------------------------
@@ -30,41 +78,106 @@ GRAPH_PATH = DATA_DIR / "graph.pkl"
 # ---------------------------------------------------
 
 def load_or_build_graph():
-    # Load cached graph if available
+    # One process builds; the others wait on the lock and open its result
+    with store_lock(GRAPH_STORE_DIR):
+        return _load_or_build_graph()
+
+
+def _load_or_build_graph():
+    # Open the stored graph if available (memory-mapped, read-only)
+    G = load_compact_graph(GRAPH_STORE_DIR)
+    if G is not None:
+        print("Loading cached knowledge graph...")
+        return G
+
+    # Convert a pickled graph from an older version once
     if GRAPH_PATH.exists():
         with open(GRAPH_PATH, "rb") as f:
-            print("Loading cached knowledge graph...")
-            return pickle.load(f)
+            print("Migrating pickled knowledge graph...")
+            G = pickle.load(f)
 
-    # Otherwise rebuild from PDFs
-    documents = {}
+        save_compact_graph(G, GRAPH_STORE_DIR)
+        return load_compact_graph(GRAPH_STORE_DIR)
 
-    for pdf in get_pdf_files():
-        documents[os.path.basename(pdf)] = extract_text(pdf)
+    # Otherwise rebuild from PDFs, streaming edges in as they are extracted
+    pdfs = get_pdf_files()
+    print("Found documents:", [os.path.basename(p) for p in pdfs])
 
-    print("Loaded documents:", list(documents.keys()))
+    G = ingest_into_graph(build_graph({}), pdfs)
 
-    all_triplets = {}
+    _save_graph(G)
+    _save_json(MANIFEST_PATH, _scan_pdfs())
 
-    for name, text in documents.items():
-        print(f"Processing: {name}")
-        raw = generate_triplets(text)
-        all_triplets[name] = parse_triplets(raw)
+    return load_compact_graph(GRAPH_STORE_DIR)
 
-    # Save triplets for debug / reuse
-    with open(TRIPLETS_PATH, "w") as f:
-        json.dump(all_triplets, f, indent=2)
 
-    print(f"Saved triplets to {TRIPLETS_PATH}")
+# ---------------------------------------------------
+# INCREMENTAL INGEST
+# ---------------------------------------------------
 
-    G = build_graph(all_triplets)
+def update_graph(G, progress=None):
+    """
+    Bring the graph up to date with the PDFs on disk and return it. G is
+    not modified.
 
-    with open(GRAPH_PATH, "wb") as f:
-        pickle.dump(G, f)
+    New, changed and deleted files are detected by content hash against
+    the manifest; only those are re-extracted, and their edges are swapped
+    by source. Unchanged documents cost nothing.
 
-    print(f"Saved graph to {GRAPH_PATH}")
+    progress receives ingest counts (see ingest.stream_triplets) plus
+    documents_total once the diff is known.
 
-    return G
+    Runs under the store lock. If another process saved a newer version
+    than G, that version is the base, so its documents are kept. A stored
+    (read-only) graph is converted to a MultiDiGraph only once there is
+    something to patch; the saved result is returned reopened from the
+    store. With nothing to do the base itself is returned.
+    """
+    with store_lock(GRAPH_STORE_DIR):
+        stored = load_compact_graph(GRAPH_STORE_DIR)
+        if stored is not None and graph_version(stored) > graph_version(G):
+            G = stored
+
+        current = _scan_pdfs()
+
+        if MANIFEST_PATH.exists():
+            manifest = _load_json(MANIFEST_PATH, {})
+        else:
+            # Graph built before manifests existed: trust documents it already holds.
+            known = set(get_graph_index(G).sources)
+            manifest = {name: h for name, h in current.items() if name in known}
+
+        added = [name for name in current if name not in manifest]
+        changed = [
+            name for name in current
+            if name in manifest and manifest[name] != current[name]
+        ]
+        deleted = [name for name in manifest if name not in current]
+
+        if not (added or changed or deleted):
+            print("Knowledge graph is up to date.")
+            return G
+
+        print("New:", added, "Changed:", changed, "Deleted:", deleted)
+
+        G = G.to_networkx() if isinstance(G, CompactGraph) else G.copy()
+        # A new version even if the files yield no edges
+        bump_version(G)
+
+        for name in changed + deleted:
+            remove_source(G, name)
+
+        if progress is not None:
+            progress(documents_total=len(added + changed))
+
+        ingest_into_graph(
+            G, [os.path.join(PDF_DIR, name) for name in added + changed], progress
+        )
+
+        _save_graph(G)
+        _save_json(MANIFEST_PATH, current)
+
+        return load_compact_graph(GRAPH_STORE_DIR)
 
 
 # ---------------------------------------------------
@@ -78,10 +191,7 @@ def run_pipeline():
     print("\n=== POLICY SUMMARIES ===")
 
     # Summaries for all known policies
-    policies = set(
-        data.get("source")
-        for _, _, data in G.edges(data=True)
-    )
+    policies = get_graph_index(G).sources
 
     for policy in policies:
         if not policy:
@@ -1,48 +1,10 @@
-from collections import defaultdict
+from .graph_index import get_graph_index
 
 
 # This builds high-level structured info per policy
 def build_policy_profile(G):
     """
-    Convert raw graph edges into grouped policy sections.
+    Grouped policy sections as (head, relation, tail) rows, read from the
+    graph index instead of rescanning every edge.
     """
-    COMPARISON_MAP = {
-        "COVERS": "Coverages",
-        "INCLUDES": "Coverages",
-        "INSURED": "Coverages",
-        "APPLIES_TO": "Coverages",
-
-        "EXCLUDES": "Exclusions",
-        "EXCLUDED_FROM": "Exclusions",
-
-        "LIMIT": "Limits",
-        "SUM_INSURED": "Limits",
-
-        "REQUIRES": "Conditions",
-        "MUST": "Conditions",
-        "OBLIGATION": "Conditions",
-
-        "DEFINED_AS": "Definitions",
-        "DEFINED_IN": "Definitions",
-    }
-
-    profile = defaultdict(lambda: {
-        "Coverages": [],
-        "Exclusions": [],
-        "Limits": [],
-        "Conditions": [],
-        "Definitions": []
-    })
-
-    for u, v, data in G.edges(data=True):
-        relation = data.get("relation", "").upper()
-        source = data.get("source", "UNKNOWN")
-
-        category = COMPARISON_MAP.get(relation)
-
-        if not category:
-            continue
-
-        profile[source][category].append((u, relation, v))
-
-    return profile
+    return get_graph_index(G).rows
@@ -1,36 +1,6 @@
-from collections import defaultdict
 from typing import Dict, List, Any
-from .local_llm import chat
-
-
-# ---------------------------------------
-# Relation → Category mapping
-# ---------------------------------------
-
-COMPARISON_MAP = {
-    # Coverages
-    "COVERS": "Coverages",
-    "INCLUDES": "Coverages",
-    "INSURED": "Coverages",
-    "APPLIES_TO": "Coverages",
-
-    # Exclusions
-    "EXCLUDES": "Exclusions",
-    "EXCLUDED_FROM": "Exclusions",
-
-    # Limits
-    "LIMIT": "Limits",
-    "SUM_INSURED": "Limits",
-
-    # Conditions
-    "REQUIRES": "Conditions",
-    "MUST": "Conditions",
-    "OBLIGATION": "Conditions",
-
-    # Definitions
-    "DEFINED_AS": "Definitions",
-    "DEFINED_IN": "Definitions",
-}
+from .local_llm import chat, prompt_lookup_tokens
+from .graph_index import COMPARISON_MAP, get_graph_index
 
 
 # ---------------------------------------
@@ -39,31 +9,9 @@ COMPARISON_MAP = {
 
 def build_policy_profile(G) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
     """
-    Convert raw KG edges into structured per-policy profiles.
+    Structured per-policy profiles, read from the graph index.
     """
-    profile = defaultdict(lambda: {
-        "Coverages": [],
-        "Exclusions": [],
-        "Limits": [],
-        "Conditions": [],
-        "Definitions": [],
-    })
-
-    for u, v, data in G.edges(data=True):
-        relation = data.get("relation", "").upper()
-        source = data.get("source", "UNKNOWN")
-
-        category = COMPARISON_MAP.get(relation)
-        if not category:
-            continue
-
-        profile[source][category].append({
-            "head": u,
-            "relation": relation,
-            "tail": v,
-        })
-
-    return dict(profile)
+    return get_graph_index(G).profiles
 
 
 # ---------------------------------------
@@ -75,8 +23,7 @@ def summarize_policy(policy_name: str, G) -> Dict[str, Any] | None:
     Returns a structured, factual policy summary.
     No interpretation. No hallucination.
     """
-    profiles = build_policy_profile(G)
-    return profiles.get(policy_name)
+    return get_graph_index(G).profiles.get(policy_name)
 
 
 # ---------------------------------------
@@ -96,28 +43,33 @@ def _humanize_rows(rows: List[Dict[str, str]]) -> List[str]:
     return list(dict.fromkeys(bullets))
 
 
-def explain_policy(policy_name: str, G) -> str:
-    """
-    Generate a clean, UI-ready explanation of a single policy.
-    Uses LLM but strictly grounded in extracted data.
-    """
+# Prompt-lookup draft length for policy explanations
+EXPLAIN_POLICY_LOOKUP_TOKENS = prompt_lookup_tokens("EXPLAIN_POLICY")
 
-    profile = summarize_policy(policy_name, G)
-    if not profile:
-        return "No information found for this policy."
+# Constant part of the explanation prompt, kept first so its KV cache can be
+# reused across policies.
+EXPLAIN_POLICY_PREFIX = """
+You are an insurance analyst.
+
+Using ONLY the facts below, write a clear, concise explanation of this policy.
+Do NOT invent details. If information is missing, say "Not specified".
+
+Instructions:
+- Write in plain English
+- No arrows, no legal tone
+- Max 8 short sentences
+- Structure with short paragraphs (not headings)
+"""
 
+
+def build_explain_prompt(policy_name: str, profile: Dict[str, Any]) -> str:
     coverages = _humanize_rows(profile.get("Coverages", []))
     exclusions = _humanize_rows(profile.get("Exclusions", []))
     limits = _humanize_rows(profile.get("Limits", []))
     conditions = _humanize_rows(profile.get("Conditions", []))
     definitions = _humanize_rows(profile.get("Definitions", []))
 
-    prompt = f"""
-You are an insurance analyst.
-
-Using ONLY the facts below, write a clear, concise explanation of this policy.
-Do NOT invent details. If information is missing, say "Not specified".
-
+    prompt = EXPLAIN_POLICY_PREFIX + f"""
 Policy name: {policy_name}
 
 Coverages:
@@ -134,18 +86,28 @@ Conditions:
 
 Definitions:
 {", ".join(definitions) if definitions else "Not specified"}
-
-Instructions:
-- Write in plain English
-- No arrows, no legal tone
-- Max 8 short sentences
-- Structure with short paragraphs (not headings)
 """
 
+    return prompt
+
+
+def explain_policy(policy_name: str, G) -> str:
+    """
+    Generate a clean, UI-ready explanation of a single policy.
+    Uses LLM but strictly grounded in extracted data.
+    """
+
+    profile = summarize_policy(policy_name, G)
+    if not profile:
+        return "No information found for this policy."
+
+    # The answer restates facts from the prompt: prompt-lookup drafts them
     response = chat(
-        [{"role": "user", "content": prompt}],
+        [{"role": "user", "content": build_explain_prompt(policy_name, profile)}],
         temperature=0.3,
         max_new_tokens=300,
+        prefix=EXPLAIN_POLICY_PREFIX,
+        prompt_lookup=EXPLAIN_POLICY_LOOKUP_TOKENS,
     )
 
     return response.strip()
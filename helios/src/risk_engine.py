@@ -1,12 +1,19 @@
+import os
+import re
 import json
-from .local_llm import chat
+import copy
+from .local_llm import chat, local_model_id, AI_PROVIDER, OPENROUTER_MODEL
+from .rule_matcher import get_rule_matcher, normalize
+from .memo import SingleFlightLRU
 
 
-RISK_PROMPT = """
-Identify business risks.
+RISK_CATEGORIES = ["physical", "liability", "operational", "people", "industry_specific"]
 
-TEXT:
-\"\"\"{TEXT}\"\"\"
+
+# Constant instructions come first so the local backend can reuse their
+# KV cache across calls; only the TEXT block varies.
+RISK_PROMPT_PREFIX = """
+Identify business risks in the TEXT at the end.
 
 Classify risks ONLY into:
 
@@ -38,6 +45,22 @@ Return JSON only:
 If unknown, return empty list for that category.
 """
 
+RISK_PROMPT = RISK_PROMPT_PREFIX + """
+TEXT:
+\"\"\"{TEXT}\"\"\"
+"""
+
+# Structured-output schema for the risk profile: one string list per category
+RISK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        category: {"type": "array", "items": {"type": "string"}}
+        for category in RISK_CATEGORIES
+    },
+    "required": RISK_CATEGORIES,
+    "additionalProperties": False,
+}
+
 
 def _safe_json_parse(raw: str):
     raw = raw.strip()
@@ -59,43 +82,28 @@ def extract_risk_profile(user_text: str):
     """
     prompt = RISK_PROMPT.replace("{TEXT}", user_text)
 
-    raw = chat([
-        {"role": "user", "content": prompt}
-    ])
+    raw = chat(
+        [{"role": "user", "content": prompt}],
+        prefix=RISK_PROMPT_PREFIX,
+        json_schema=RISK_SCHEMA,
+    )
 
     try:
         return _safe_json_parse(raw)
     except Exception:
-        return {
-            "physical": [],
-            "liability": [],
-            "operational": [],
-            "people": [],
-            "industry_specific": []
-        }
+        return {category: [] for category in RISK_CATEGORIES}
 
 
 # ---------------------------
 # Classification Layer
 # ---------------------------
 
-MANDATORY_RULES = {
-    "fire": "property_fire_cover",
-    "theft": "burglary_theft_cover",
-    "business interruption": "loss_of_profit",
-    "employee accident": "workmen_compensation",
-    "customer injury": "public_liability",
-    "data breach": "cyber_insurance",
-    "food spoilage": "deterioration_of_stock",
-}
+# The rulebook lives in rules/risk_rules.json (phrases, covers, categories
+# and synonyms); these views of it are kept for callers that read them.
+_RULES = get_rule_matcher().rules
 
-OPTIONAL_SUGGESTIONS = {
-    "natural disaster": "catastrophe_addon",
-    "equipment breakdown": "machinery_breakdown",
-    "inventory spoilage": "stock_deterioration",
-    "customer complaints": "professional_liability",
-    "medical negligence": "medical_malpractice",
-}
+MANDATORY_RULES = {r["phrase"]: r["cover"] for r in _RULES if r["kind"] == "mandatory"}
+OPTIONAL_SUGGESTIONS = {r["phrase"]: r["cover"] for r in _RULES if r["kind"] == "optional"}
 
 
 def classify_mandatory_optional(risks: dict):
@@ -103,35 +111,174 @@ def classify_mandatory_optional(risks: dict):
     Returns (mandatory, optional)
     Lists are deduplicated and stable.
     """
+    matcher = get_rule_matcher()
     mandatory = set()
     optional = set()
 
     for _, items in risks.items():
         for risk in items:
-            r = risk.lower()
+            for rule in matcher.find(risk):
+                if rule["kind"] == "mandatory":
+                    mandatory.add(rule["cover"])
+                else:
+                    optional.add(rule["cover"])
 
-            for k, v in MANDATORY_RULES.items():
-                if k in r:
-                    mandatory.add(v)
+    return sorted(mandatory), sorted(optional)
 
-            for k, v in OPTIONAL_SUGGESTIONS.items():
-                if k in r:
-                    optional.add(v)
 
-    return sorted(mandatory), sorted(optional)
+# ---------------------------
+# Rule Fast Path
+# ---------------------------
+
+# Short, plainly worded inputs are classified by the rulebook alone; longer,
+# negated or only partly understood text goes to the LLM.
+RISK_FAST_PATH = os.getenv("RISK_FAST_PATH", "1") != "0"
+FAST_PATH_MAX_WORDS = int(os.getenv("RISK_FAST_PATH_MAX_WORDS", "40"))
+
+# Share of the text's risk words the matched phrases must account for. At
+# 1.0 every word that names a harm is part of a rule match: a harm the
+# rulebook cannot place ("freezer failing", "customers suing") may be a
+# risk it would miss. Words describing the business ("sneaker store") are
+# not risk words and never send the text to the LLM.
+FAST_PATH_MIN_COVERAGE = float(os.getenv("RISK_FAST_PATH_MIN_COVERAGE", "1.0"))
+
+# Closed vocabulary of harm words. A word is a risk word when it starts
+# with one of FAST_PATH_RISK_ROOTS followed by at most
+# FAST_PATH_RISK_SUFFIX characters ("fail" -> "failing", "injur" ->
+# "injuries", but not "break" -> "breakfast"), or is one of the short
+# FAST_PATH_RISK_WORDS, which would prefix too many unrelated words.
+FAST_PATH_RISK_ROOTS = (
+    "accident", "allerg", "attack", "bankrupt", "blackout", "breach", "break",
+    "breakdown", "burglar", "burn", "claim", "collaps", "complain", "contamin", "corrupt",
+    "crash", "cyber", "damag", "danger", "death", "defect", "delay", "disast",
+    "disput", "disrupt", "earthquak", "embezzl", "error", "explod", "explosion",
+    "fail", "failure", "flood", "fraud", "hack", "harm", "hazard", "hurt",
+    "illness", "injur", "lawsuit", "leak", "liabil", "litig", "loss", "lost",
+    "malfunct", "malware", "mistake", "negligen", "outage", "penalt", "phish",
+    "poison", "pollut", "ransom", "recall", "riot", "robb", "rott", "scam",
+    "shortage", "spill", "spoil", "steal", "stolen", "storm", "strike",
+    "terror", "theft", "thief", "thiev", "toxic", "vandal", "virus",
+)
+FAST_PATH_RISK_SUFFIX = 3
+FAST_PATH_RISK_WORDS = {
+    "bad", "die", "died", "dies", "ill", "rot", "sick",
+    "sue", "sued", "sues", "suing", "war", "wars",
+}
+
+
+def _is_risk_word(word: str) -> bool:
+    return word in FAST_PATH_RISK_WORDS or any(
+        word.startswith(root) and len(word) - len(root) <= FAST_PATH_RISK_SUFFIX
+        for root in FAST_PATH_RISK_ROOTS
+    )
+
+
+_NEGATION = re.compile(
+    r"\b(no|not|never|without|none|nor|don't|doesn't|isn't|aren't|except)\b",
+    re.IGNORECASE,
+)
+
+_FAST_PATH_WORDS = re.compile(r"[a-z0-9']+")
+
+
+def rule_coverage(user_text: str):
+    """
+    (matched rules, share of risk words inside a matched phrase). Risk
+    words are the words of every match plus any other word _is_risk_word
+    recognizes; the rest describe the business and are not counted.
+    """
+    matcher = get_rule_matcher()
+    text = normalize(user_text)
+    spans = matcher.matches(text)
+
+    content = covered = 0
+    for word in _FAST_PATH_WORDS.finditer(text):
+        # A plural ("fires") extends past its phrase, so test for overlap
+        if any(start < word.end() and word.start() < end for start, end, _ in spans):
+            content += 1
+            covered += 1
+        elif _is_risk_word(word.group()):
+            content += 1
+
+    return matcher.find(text), (covered / content if content else 0.0)
+
+
+def rule_risk_profile(user_text: str):
+    """
+    Risk profile from rule phrases (and their synonyms) alone, or None when
+    the text is too long, negated, matches nothing, or names harms the
+    rulebook cannot account for (see FAST_PATH_MIN_COVERAGE).
+    """
+    if len(user_text.split()) > FAST_PATH_MAX_WORDS or _NEGATION.search(user_text):
+        return None
+
+    rules, coverage = rule_coverage(user_text)
+    if not rules or coverage < FAST_PATH_MIN_COVERAGE:
+        return None
+
+    risks = {category: [] for category in RISK_CATEGORIES}
+    for rule in rules:
+        risks[rule["category"]].append(rule["phrase"])
+
+    return risks
+
+
+# ---------------------------
+# Precheck Memo
+# ---------------------------
+
+PRECHECK_MEMO_SIZE = int(os.getenv("PRECHECK_MEMO_SIZE", "256"))
+
+_precheck_memo = SingleFlightLRU(PRECHECK_MEMO_SIZE)
+
+
+def normalize_text(user_text: str) -> str:
+    """
+    Case and whitespace folded, so resent descriptions share one entry.
+    """
+    return " ".join(user_text.lower().split())
+
+
+def _precheck_model() -> str:
+    return OPENROUTER_MODEL if AI_PROVIDER == "openrouter" else local_model_id()
 
 
 def policy_precheck(user_text: str):
     """
     Full risk pipeline — returns structured object.
+    Memoized per normalized text and model; concurrent identical requests
+    share one run, computed from the first caller's original text (the
+    normalized form is only the key). Callers get their own copy.
+    """
+    result = _precheck_memo.get(
+        (_precheck_model(), normalize_text(user_text)),
+        lambda: _policy_precheck(user_text),
+    )
+    return copy.deepcopy(result)
+
+
+def precheck_memo_stats() -> dict:
+    return _precheck_memo.stats()
+
+
+def _policy_precheck(user_text: str):
     """
-    risks = extract_risk_profile(user_text)
+    "path" records whether the rulebook ("rules") or the LLM ("llm") served it.
+    """
+    risks = rule_risk_profile(user_text) if RISK_FAST_PATH else None
+    path = "rules"
+
+    if risks is None:
+        risks = extract_risk_profile(user_text)
+        path = "llm"
+
     mandatory, optional = classify_mandatory_optional(risks)
 
     return {
         "risks": risks,
         "mandatory": mandatory,
         "optional": optional,
+        "path": path,
     }
 
 
@@ -196,5 +343,6 @@ def analyze_business_risk(business_profile: dict):
         "input_summary": text.strip(),
         "risks": result.get("risks", {}),
         "mandatory_coverages": result.get("mandatory", []),
-        "optional_coverages": result.get("optional", [])
+        "optional_coverages": result.get("optional", []),
+        "path": result.get("path"),
     }
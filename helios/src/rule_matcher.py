@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import threading
+from pathlib import Path
+from collections import deque
+
+
+# Shipped with the code (not under ./data), so resolved from this file
+RISK_RULES_PATH = Path(os.getenv(
+    "RISK_RULES_PATH",
+    Path(__file__).resolve().parent.parent / "rules" / "risk_rules.json",
+))
+
+# Suffixes a phrase may carry and still match ("fire" -> "fires")
+PLURAL_SUFFIXES = ("s", "es")
+
+_SEPARATORS = re.compile(r"[\s\-_/]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase and fold runs of whitespace, hyphens and slashes to one space,
+    so "Break-in" and "break  in" match the same phrase.
+    """
+    return _SEPARATORS.sub(" ", text.lower())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "'"
+
+
+# ---------------------------------------------------
+# AHO-CORASICK AUTOMATON
+# ---------------------------------------------------
+
+class RuleMatcher:
+    """
+    Multi-pattern matcher over a rulebook: every phrase and synonym is
+    compiled once into an Aho-Corasick automaton, so a scan costs one pass
+    over the text however many rules there are.
+
+    Rules are dicts with "phrase", "cover", "kind" ("mandatory"/"optional"),
+    "category" and optional "synonyms"; a synonym match reports its rule.
+    Optional "policy_terms" (how policies word the cover) are not matched
+    here; semantic_match uses them.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+        # Node i: goto[i] maps char -> node, fail[i] is the fallback node,
+        # out[i] lists (pattern length, rule index) ending here.
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+        for index, rule in enumerate(self.rules):
+            for pattern in [rule["phrase"], *rule.get("synonyms", [])]:
+                self._add(normalize(pattern).strip(), index)
+
+        self._link()
+
+    @classmethod
+    def from_file(cls, path=RISK_RULES_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            book = json.load(f)
+
+        return cls(
+            dict(rule, kind=kind)
+            for kind, rules in book.items()
+            for rule in rules
+        )
+
+    def _add(self, pattern: str, index: int):
+        node = 0
+        for ch in pattern:
+            if ch not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.goto[node][ch] = len(self.goto) - 1
+            node = self.goto[node][ch]
+        self.out[node].append((len(pattern), index))
+
+    def _link(self):
+        """
+        Breadth-first pass setting fail links and merging their outputs.
+        """
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def _whole_word(self, text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+
+        if end == len(text) or not _is_word_char(text[end]):
+            return True
+
+        for suffix in PLURAL_SUFFIXES:
+            stop = end + len(suffix)
+            if text.startswith(suffix, end) and (
+                stop == len(text) or not _is_word_char(text[stop])
+            ):
+                return True
+
+        return False
+
+    def matches(self, text: str) -> list:
+        """
+        Every whole-word occurrence of a phrase or synonym in text, as
+        (start, end, rule) offsets into normalize(text).
+        """
+        text = normalize(text)
+        node = 0
+        found = []
+
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+
+            for length, index in self.out[node]:
+                if self._whole_word(text, i + 1 - length, i + 1):
+                    found.append((i + 1 - length, i + 1, self.rules[index]))
+
+        return found
+
+    def find(self, text: str) -> list:
+        """
+        Rules whose phrase or a synonym occurs in text as whole words,
+        deduplicated, in order of first occurrence.
+        """
+        found = {}
+        for _, _, rule in self.matches(text):
+            found.setdefault(id(rule), rule)
+
+        return list(found.values())
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_rule_matcher() -> RuleMatcher:
+    global _matcher
+
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = RuleMatcher.from_file(RISK_RULES_PATH)
+        return _matcher
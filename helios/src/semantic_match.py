@@ -0,0 +1,347 @@
+import os
+import re
+import zlib
+import functools
+import threading
+import weakref
+
+import numpy as np
+
+from .graph_index import get_graph_index, graph_version
+from .rule_matcher import get_rule_matcher
+
+
+# Hashed character n-gram space, and the similarity two words need to count
+# as the same word. Inflections share a stem and score 1.0; look-alikes stay
+# below 0.85 ("employee" / "employer" 0.79, "liability" / "disability" 0.57).
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "2048"))
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.85"))
+NGRAM_SIZES = (3, 4)
+
+# Words that say nothing about what is covered
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "by", "with",
+    "cover", "covers", "coverage", "insurance", "insured", "policy", "addon",
+}
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+# ---------------------------------------------------
+# VECTORIZER
+# ---------------------------------------------------
+
+@functools.lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """
+    Light suffix stripping so inflections meet: fires/fire, injuries/injury,
+    breaches/breach, flooding/flood, damaged/damage.
+    """
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 4 and word.endswith("es") and word[-4:-2] in ("ch", "sh", "ss"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    elif len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 4 and word.endswith("ed"):
+        word = word[:-2]
+
+    return word[:-1] if len(word) > 3 and word.endswith("e") else word
+
+
+def _words(text: str) -> list:
+    """
+    Stemmed content words of text, in order, without repeats.
+    """
+    words = _WORDS.findall(text.lower().replace("_", " "))
+    return list(dict.fromkeys(_stem(w) for w in words if w not in STOPWORDS))
+
+
+def _ngram_counts(words: list) -> np.ndarray:
+    """
+    Hashed character n-gram counts, one row per word (crc32, so stable
+    across processes, unlike hash()).
+    """
+    rows = []
+    buckets = []
+
+    for row, word in enumerate(words):
+        padded = f" {word} ".encode("utf-8")
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                rows.append(row)
+                buckets.append(zlib.crc32(padded[i:i + n]) % SEMANTIC_DIM)
+
+    counts = np.zeros((len(words), SEMANTIC_DIM), dtype=np.float32)
+    np.add.at(counts, (rows, buckets), 1)
+    return counts
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class CoverageVectors:
+    """
+    Word-level view of every covered and excluded term in the graph, terms
+    grouped by source.
+
+    terms / spans[source]                 -> covered terms, (start, stop) rows
+    excluded / excluded_spans[source]     -> excluded terms, likewise
+    words                                 -> stemmed vocabulary of all terms
+    matrix                                -> L2-normalized TF-IDF rows per word
+    idf                                   -> weights shared with the queries
+
+    A term is stored as the list of its word ids (flattened, with offsets),
+    so scores reduce over words with np.maximum / np.minimum.reduceat.
+    """
+
+    def __init__(self, G):
+        index = get_graph_index(G)
+
+        self.version = graph_version(G)
+        self.terms, self.spans = self._group(index.covers)
+        self.excluded, self.excluded_spans = self._group(index.excludes)
+
+        vocabulary = {}
+        self._covered = self._term_words(self.terms, vocabulary)
+        self._excluded = self._term_words(self.excluded, vocabulary)
+        self.words = list(vocabulary)
+
+        counts = _ngram_counts(self.words)
+
+        df = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(self.words)) / (1 + df)) + 1).astype(np.float32)
+        self.matrix = _normalize_rows(counts * self.idf)
+
+        self._query_rows = None
+        self._query_scores = None
+
+    @staticmethod
+    def _group(terms_by_source: dict):
+        terms = []
+        spans = {}
+
+        for source in sorted(terms_by_source):
+            start = len(terms)
+            terms.extend(sorted(terms_by_source[source]))
+            spans[source] = (start, len(terms))
+
+        return terms, spans
+
+    @staticmethod
+    def _term_words(terms: list, vocabulary: dict):
+        """
+        (flat word ids, start offset per term). A term without content words
+        points at the id one past the vocabulary, a column that scores 0.
+        """
+        flat = []
+        offsets = []
+
+        for term in terms:
+            offsets.append(len(flat))
+            ids = [vocabulary.setdefault(w, len(vocabulary)) for w in _words(term)]
+            flat.extend(ids or [-1])
+
+        flat = np.array(flat, dtype=np.int64)
+        return flat, np.array(offsets, dtype=np.int64)
+
+    def word_scores(self, words: list) -> np.ndarray:
+        """
+        Similarity of each query word to each vocabulary word, plus a
+        trailing all-zero column for terms without content words.
+        """
+        scores = np.zeros((len(words), len(self.words) + 1), dtype=np.float32)
+        if words and self.words:
+            embedded = _normalize_rows(_ngram_counts(words) * self.idf)
+            scores[:, :-1] = embedded @ self.matrix.T
+        return scores
+
+    def query_scores(self):
+        """
+        ({query word: row}, word_scores of every word of every rule query),
+        computed with one matrix multiply on first use. Queries come from
+        the rulebook, so they are fixed for the life of these vectors.
+        """
+        if self._query_scores is None:
+            rows = {}
+            for queries in _queries_by_cover().values():
+                for q in queries:
+                    for w in _words(q):
+                        rows.setdefault(w, len(rows))
+
+            self._query_scores = self.word_scores(list(rows))
+            self._query_rows = rows
+
+        return self._query_rows, self._query_scores
+
+
+_vectors = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_coverage_vectors(G) -> CoverageVectors:
+    """
+    Returns the term vectors for G, built once per graph version.
+    """
+    with _lock:
+        vectors = _vectors.get(G)
+
+        if vectors is None or vectors.version != graph_version(G):
+            vectors = CoverageVectors(G)
+            _vectors[G] = vectors
+
+        return vectors
+
+
+# ---------------------------------------------------
+# SCORING
+# ---------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _queries_by_cover() -> dict:
+    queries = {}
+
+    for rule in get_rule_matcher().rules:
+        texts = queries.setdefault(rule["cover"], [])
+        texts.append(rule["phrase"])
+        texts.extend(rule.get("synonyms", []))
+        texts.extend(rule.get("policy_terms", []))
+
+    return {cover: [q for q in texts if _words(q)] for cover, texts in queries.items()}
+
+
+def need_queries(need: str) -> list:
+    """
+    Texts that stand for a need: the rule phrases, synonyms and policy_terms
+    (how policy wordings name the cover) of the rules that lead to it. The
+    bare cover name is not used: its generic words ("loss", "liability")
+    would match unrelated covers.
+    """
+    return _queries_by_cover().get(need, [])
+
+
+def _score(vectors: CoverageVectors, needs: list, term_words, start: int, stop: int, reverse: bool):
+    """
+    scores[i, j] for need i against term j of [start, stop), over the best
+    of the need's queries.
+
+    Forward, a query must find each of its words in the term: the score is
+    the weakest of its words' best matches. With reverse, the term must
+    find each of its words in the query instead.
+
+    Query words are scored against the vocabulary once per graph version
+    (CoverageVectors.query_scores); the rest are reductions over
+    (query word, term word) rows and columns.
+    """
+    flat, offsets = term_words
+    scores = np.zeros((len(needs), stop - start), dtype=np.float32)
+    if start == stop:
+        return scores
+
+    lo = offsets[start]
+    hi = offsets[stop] if stop < len(offsets) else len(flat)
+    ids, bounds = flat[lo:hi], offsets[start:stop] - lo
+
+    # Rows of every query of every need, flattened: query k spans
+    # rows[query_offsets[k]:...], and need i owns the queries of owners == i
+    row, word_scores = vectors.query_scores()
+    rows, query_offsets, owners = [], [], []
+    for i, need in enumerate(needs):
+        for q in need_queries(need):
+            query_offsets.append(len(rows))
+            owners.append(i)
+            rows.extend(row[w] for w in _words(q))
+
+    if not rows:
+        return scores
+
+    by_word = word_scores[:, ids]
+
+    if reverse:
+        # Best query word per term word, weakest term word per term
+        per_query = np.minimum.reduceat(
+            np.maximum.reduceat(by_word[rows], query_offsets, axis=0), bounds, axis=1,
+        )
+    else:
+        # Best term word per query word, weakest query word per term
+        per_query = np.minimum.reduceat(
+            np.maximum.reduceat(by_word, bounds, axis=1)[rows], query_offsets, axis=0,
+        )
+
+    # Best query per need
+    np.maximum.at(scores, owners, per_query)
+    return scores
+
+
+def score_needs(G, needs: list, policy_name: str = None):
+    """
+    Scores of every need against every covered term, or only the terms of
+    policy_name when given.
+
+    Returns (vectors, scores) where scores[i, j] is the best score of need i
+    (over its query texts) against term j of the selected range: 1.0 when
+    every word of a query occurs in the term, up to inflection.
+    """
+    vectors = get_coverage_vectors(G)
+    start, stop = vectors.spans.get(policy_name, (0, 0)) if policy_name \
+        else (0, len(vectors.terms))
+
+    return vectors, _score(vectors, needs, vectors._covered, start, stop, reverse=False)
+
+
+def score_exclusions(G, needs: list, policy_name: str = None):
+    """
+    Like score_needs, against excluded terms, and in the other direction:
+    an exclusion scores high when all of its words occur in one of the
+    need's queries, i.e. it excludes at least the whole need ("fire" does,
+    "fire caused by war" does not).
+    """
+    vectors = get_coverage_vectors(G)
+    start, stop = vectors.excluded_spans.get(policy_name, (0, 0)) if policy_name \
+        else (0, len(vectors.excluded))
+
+    return vectors, _score(vectors, needs, vectors._excluded, start, stop, reverse=True)
+
+
+def _best_terms(block: np.ndarray, terms: list, start: int, needs: list, threshold: float):
+    matches = {}
+    if block.shape[1] == 0:
+        return matches
+
+    best = block.argmax(axis=1)
+    for i, need in enumerate(needs):
+        score = float(block[i, best[i]])
+        if score >= threshold:
+            matches[need] = {
+                "term": terms[start + best[i]],
+                "score": round(score, 3),
+            }
+
+    return matches
+
+
+def match_needs(G, policy_name: str, needs: list, threshold: float = SEMANTIC_THRESHOLD):
+    """
+    Best matching covered term of policy_name for each need.
+
+    Returns (matches, excluded): {need: {"term": ..., "score": ...}} for
+    needs scoring at least threshold and not excluded by the policy, and the
+    same shape for needs one of its excluded terms rules out. Needs in
+    neither are left out.
+    """
+    vectors, block = score_needs(G, needs, policy_name)
+    _, excluded_block = score_exclusions(G, needs, policy_name)
+
+    excluded = _best_terms(
+        excluded_block, vectors.excluded,
+        vectors.excluded_spans.get(policy_name, (0, 0))[0], needs, threshold,
+    )
+    matches = _best_terms(
+        block, vectors.terms, vectors.spans.get(policy_name, (0, 0))[0], needs, threshold,
+    )
+
+    return {n: m for n, m in matches.items() if n not in excluded}, excluded
@@ -0,0 +1,67 @@
+import json
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+
+DATA_DIR = Path("./data")
+DATA_DIR.mkdir(exist_ok=True)
+
+TRIPLET_CACHE_PATH = DATA_DIR / "triplet_cache.sqlite"
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _get_conn():
+    global _conn
+
+    if _conn is None:
+        _conn = sqlite3.connect(TRIPLET_CACHE_PATH, check_same_thread=False)
+        _conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS triplets (
+                chunk_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                triplets TEXT NOT NULL,
+                PRIMARY KEY (chunk_hash, model, prompt_version)
+            )
+            """
+        )
+        _conn.commit()
+
+    return _conn
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_cached_triplets(text: str, model: str, prompt_version: str):
+    """
+    Returns the cached triplet list for this chunk, or None on a miss.
+    """
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT triplets FROM triplets "
+            "WHERE chunk_hash = ? AND model = ? AND prompt_version = ?",
+            (chunk_hash(text), model, prompt_version),
+        ).fetchone()
+
+    if row is None:
+        return None
+
+    return [tuple(t) for t in json.loads(row[0])]
+
+
+def put_cached_triplets(text: str, model: str, prompt_version: str, triplets):
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO triplets "
+            "(chunk_hash, model, prompt_version, triplets) VALUES (?, ?, ?, ?)",
+            (chunk_hash(text), model, prompt_version, json.dumps(triplets)),
+        )
+        conn.commit()
@@ -1,5 +1,9 @@
+import os
 import re
+
+from .config import TRIPLET_MODEL
 from .llm_client import call_openrouter
+from .triplet_cache import get_cached_triplets, put_cached_triplets
 
 
 TRIPLET_PROMPT = """
@@ -15,6 +19,24 @@ Text:
 {TEXT}
 """
 
+# Bump whenever TRIPLET_PROMPT or parse_triplets changes so cached
+# extractions from the old prompt are not reused.
+PROMPT_VERSION = "1"
+
+# Token budget per chunk sent to the extractor, and how many chunks are
+# extracted in parallel for a single document.
+CHUNK_TOKENS = int(os.getenv("TRIPLET_CHUNK_TOKENS", "1500"))
+TRIPLET_WORKERS = int(os.getenv("TRIPLET_WORKERS", "4"))
+
+# Rough chars-per-token ratio; good enough for budgeting English policy text.
+CHARS_PER_TOKEN = 4
+
+# Lines that open a new clause: "4.", "4.2", "(a)", "Section 3", "CLAUSE 7", ...
+CLAUSE_START = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*[.)]?\s|\([a-z0-9]+\)\s|(?:section|clause|part|schedule)\s+\w+)",
+    re.IGNORECASE,
+)
+
 
 def generate_triplets(text: str) -> str:
     prompt = TRIPLET_PROMPT.replace("{TEXT}", text)
@@ -25,3 +47,136 @@ def parse_triplets(raw_text: str):
     pattern = r"\(([^,]+),\s*([^,]+),\s*([^)]+)\)"
     matches = re.findall(pattern, raw_text)
     return [(h.strip(), r.strip(), t.strip()) for h, r, t in matches]
+
+
+# ---------------------------------------------------
+# CHUNKING
+# ---------------------------------------------------
+
+def _estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _split_blocks(page: str):
+    """
+    Split one page into clause-sized blocks (blank lines or clause headings).
+    """
+    blocks = []
+    current = []
+
+    for line in page.splitlines():
+        if not line.strip() or CLAUSE_START.match(line):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if not line.strip():
+                continue
+        current.append(line)
+
+    if current:
+        blocks.append("\n".join(current))
+
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int):
+    """
+    Break a single block that exceeds the budget, by lines then by characters.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = ""
+
+    for line in block.splitlines():
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+
+        if current and len(current) + len(line) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+
+        current = f"{current}\n{line}" if current else line
+
+    if current:
+        pieces.append(current)
+
+    return pieces
+
+
+def _page_chunks(page: str, max_tokens: int):
+    """
+    Pack one page's clause blocks into token-budgeted chunks.
+    """
+    current = []
+    current_tokens = 0
+
+    for block in _split_blocks(page):
+        tokens = _estimate_tokens(block)
+
+        if tokens > max_tokens:
+            pieces = _split_oversized(block, max_tokens)
+        else:
+            pieces = [block]
+
+        for piece in pieces:
+            piece_tokens = _estimate_tokens(piece)
+
+            if current and current_tokens + piece_tokens > max_tokens:
+                yield "\n\n".join(current)
+                current = []
+                current_tokens = 0
+
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        yield "\n\n".join(current)
+
+
+def iter_chunks(pages, max_tokens: int = CHUNK_TOKENS):
+    """
+    Lazily pack page texts into token-budgeted chunks, splitting at
+    clause boundaries. A chunk never spans two pages: an unchanged page
+    always yields the same chunks, so editing one page leaves the cached
+    extractions of every other page valid.
+    """
+    for page in pages:
+        yield from _page_chunks(page, max_tokens)
+
+
+# ---------------------------------------------------
+# EXTRACTION
+# ---------------------------------------------------
+
+def extract_chunk_triplets(chunk: str):
+    """
+    Extract triplets for one chunk, served from the on-disk cache when the
+    same chunk was already extracted with this model and prompt version.
+    """
+    cached = get_cached_triplets(chunk, TRIPLET_MODEL, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
+    triplets = parse_triplets(generate_triplets(chunk))
+    put_cached_triplets(chunk, TRIPLET_MODEL, PROMPT_VERSION, triplets)
+    return triplets
+
+
+def dedupe_triplets(triplets, seen: set):
+    """
+    Drop triplets already in seen (case-insensitive), keeping order, and
+    add the new ones to seen. Share one seen set per document.
+    """
+    fresh = []
+
+    for h, r, t in triplets:
+        key = (h.lower(), r.upper(), t.lower())
+        if key not in seen:
+            seen.add(key)
+            fresh.append((h, r, t))
+
+    return fresh
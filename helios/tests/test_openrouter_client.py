@@ -0,0 +1,92 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.openrouter_client import OpenRouterClient
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """
+    Answers the first request with 429 + Retry-After: 1, then with a
+    completion (or an SSE stream when the request asks for one).
+    """
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((time.monotonic(), self.headers.get("Authorization")))
+
+        if len(self.requests) == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if body.get("stream"):
+            out = "".join(
+                f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n"
+                for piece in ("Hello", " world")
+            ) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            out = json.dumps({"choices": [{"message": {"content": " Hello world "}}]})
+            content_type = "application/json"
+
+        out = out.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    _StandIn.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/chat/completions"
+
+
+def test_retries_after_429_honouring_retry_after():
+    server, url = _serve()
+    client = OpenRouterClient(url=url, api_key="test-key", rpm=6000)
+
+    async def run():
+        try:
+            return await client.achat([{"role": "user", "content": "hi"}], model="stand-in")
+        finally:
+            await client.aclose()
+
+    try:
+        assert asyncio.run(run()) == "Hello world"
+    finally:
+        server.shutdown()
+
+    (first, auth), (second, _) = _StandIn.requests
+    assert auth == "Bearer test-key"
+    assert second - first >= 1.0
+
+
+def test_stream_retries_then_yields_pieces():
+    server, url = _serve()
+    client = OpenRouterClient(url=url, api_key="test-key", rpm=6000)
+
+    async def run():
+        try:
+            return [p async for p in client.astream([{"role": "user", "content": "hi"}], model="stand-in")]
+        finally:
+            await client.aclose()
+
+    try:
+        assert asyncio.run(run()) == ["Hello", " world"]
+    finally:
+        server.shutdown()
+
+    assert len(_StandIn.requests) == 2
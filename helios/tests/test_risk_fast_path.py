@@ -0,0 +1,31 @@
+from src.risk_engine import rule_risk_profile, policy_precheck
+
+
+def test_plain_text_is_served_from_rules():
+    risks = rule_risk_profile("Theft and fire are our main risks.")
+
+    assert risks["physical"] == ["theft", "fire"]
+
+
+def test_business_description_stays_on_rules():
+    # Words describing the business are not unexplained risks
+    result = policy_precheck("sneaker store, theft and fire")
+
+    assert result["path"] == "rules"
+    assert result["risks"]["physical"] == ["theft", "fire"]
+    assert rule_risk_profile("I run a sneaker store. Theft and fire are major risks.") is not None
+    assert rule_risk_profile("shoe shop worried about theft") is not None
+
+
+def test_unmatched_risks_fall_back_to_llm():
+    # Each text names risks the rulebook has no phrase for
+    assert rule_risk_profile(
+        "Restaurant with 30 staff; kitchen fires, slips by diners, our freezer "
+        "failing and spoiling food, and card data being hacked"
+    ) is None
+    assert rule_risk_profile("Bakery with ovens: fire and allergic customers suing us") is None
+    assert rule_risk_profile("Sneaker store: fire and lawsuits") is None
+
+
+def test_negated_text_falls_back_to_llm():
+    assert rule_risk_profile("Fire is not a concern for us") is None
@@ -0,0 +1,76 @@
+from src.graph_builder import build_graph
+from src.semantic_match import match_needs
+from src.coverage_matcher import compare_policy_with_needs, coverage_matrix
+
+
+def _policy(*triplets):
+    return build_graph({"policy.pdf": [("Policy", r, t) for r, t in triplets]})
+
+
+def _matches(G, needs):
+    matches, _ = match_needs(G, "policy.pdf", needs)
+    return matches
+
+
+def test_covered_terms_match_by_phrase_and_inflection():
+    G = _policy(
+        ("COVERS", "Fires and allied perils"),
+        ("COVERS", "Theft of stock"),
+        ("COVERS", "Interruption of business"),
+        ("COVERS", "Public Liability"),
+    )
+
+    matches = _matches(G, [
+        "property_fire_cover", "burglary_theft_cover", "loss_of_profit", "public_liability",
+    ])
+
+    assert matches["property_fire_cover"]["term"] == "fires and allied perils"
+    assert matches["burglary_theft_cover"]["term"] == "theft of stock"
+    assert matches["loss_of_profit"]["term"] == "interruption of business"
+    assert matches["public_liability"]["term"] == "public liability"
+
+
+def test_partial_word_overlap_is_not_coverage():
+    G = _policy(
+        ("COVERS", "employee theft"),
+        ("COVERS", "business"),
+        ("COVERS", "professional liability"),
+        ("COVERS", "property damage"),
+    )
+
+    assert _matches(G, [
+        "workmen_compensation", "loss_of_profit", "public_liability", "property_fire_cover",
+    ]) == {}
+
+
+def test_exclusion_rules_out_a_covered_need():
+    G = _policy(
+        ("COVERS", "fire damage"),
+        ("EXCLUDES", "fire"),
+        ("COVERS", "theft"),
+        ("EXCLUDES", "theft by employees"),
+    )
+
+    comparison = compare_policy_with_needs(
+        G, "policy.pdf",
+        {"mandatory": ["property_fire_cover", "burglary_theft_cover"], "optional": []},
+    )
+
+    assert comparison["mandatory_missing"] == ["property_fire_cover"]
+    assert comparison["excluded"]["property_fire_cover"]["term"] == "fire"
+    assert comparison["mandatory_covered"] == ["burglary_theft_cover"]
+
+
+def test_coverage_matrix_agrees_with_compare():
+    G = build_graph({
+        "a.pdf": [("A", "COVERS", "fire"), ("A", "EXCLUDES", "fire")],
+        "b.pdf": [("B", "COVERS", "burglary"), ("B", "COVERS", "employee theft")],
+    })
+    needs = {"mandatory": ["property_fire_cover", "burglary_theft_cover"], "optional": ["workmen_compensation"]}
+
+    result = coverage_matrix(G, needs)
+
+    covered = [[score >= result["threshold"] for score in row] for row in result["matrix"]]
+    assert covered == [[False, False], [False, True], [False, False]]
+    for entry in result["ranking"]:
+        assert entry["comparison"] == compare_policy_with_needs(G, entry["policy"], needs)